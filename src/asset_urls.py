@@ -0,0 +1,83 @@
+import hashlib
+import json
+import re
+
+# Quoted attribute URLs in template markup; rendered pages get theirs
+# rewritten as text nodes are turned into HTML. Templates are rewritten before
+# --minify drops the quotes.
+attribute_url_pattern = re.compile(r"""\b(href|src)=(["'])(.*?)\2""")
+
+# Root-relative URL of each static file -> URL of its fingerprinted copy.
+asset_urls = {}
+# Root-relative URL of each image -> its size and resized variants.
+image_variants = {}
+# Changes whenever either mapping does; part of every cache key for HTML that
+# embeds these URLs.
+asset_urls_digest = ""
+
+
+def update_digest():
+    global asset_urls_digest
+    if not asset_urls and not image_variants:
+        asset_urls_digest = ""
+        return
+    digest = hashlib.sha256()
+    digest.update(json.dumps([asset_urls, image_variants], sort_keys=True).encode())
+    asset_urls_digest = digest.hexdigest()
+
+def set_asset_urls(mapping):
+    global asset_urls
+    asset_urls = dict(mapping)
+    update_digest()
+
+def set_image_variants(mapping):
+    global image_variants
+    image_variants = dict(mapping)
+    update_digest()
+
+def snapshot():
+    return asset_urls, image_variants
+
+def restore(state):
+    global asset_urls, image_variants
+    asset_urls, image_variants = dict(state[0]), dict(state[1])
+    update_digest()
+
+def rewrite_url(url):
+    if not asset_urls or not url or url[0] != "/":
+        return url
+    # Keep any query or fragment; only the path is fingerprinted.
+    end = len(url)
+    for separator in "?#":
+        index = url.find(separator)
+        if index != -1 and index < end:
+            end = index
+    fingerprinted = asset_urls.get(url[:end])
+    if fingerprinted is None:
+        return url
+    return fingerprinted + url[end:]
+
+def image_props(url):
+    info = image_variants.get(url)
+    if info is None:
+        return None
+    props = {"width": str(info["width"]), "height": str(info["height"])}
+    if info["srcset"]:
+        candidates = [f"{variant_url} {width}w" for variant_url, width in info["srcset"]]
+        candidates.append(f"{rewrite_url(url)} {info['width']}w")
+        props["srcset"] = ", ".join(candidates)
+        # Without sizes the browser assumes the image spans the viewport; it
+        # never shows wider than its own width.
+        props["sizes"] = f"(max-width: {info['width']}px) 100vw, {info['width']}px"
+    props["loading"] = "lazy"
+    return props
+
+def rewrite_html_urls(html):
+    if not asset_urls:
+        return html
+    return attribute_url_pattern.sub(
+        lambda match: f"{match.group(1)}={match.group(2)}{rewrite_url(match.group(3))}{match.group(2)}", html,
+    )
+
+def html_urls(html):
+    return [match.group(3) for match in attribute_url_pattern.finditer(html)]
@@ -0,0 +1,129 @@
+import errno
+import os
+import shutil
+
+from build_manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+link_modes = ("auto", "copy", "hardlink", "reflink")
+
+# ioctl request number for FICLONE on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+# Devices (st_dev of the destination directory) where a reflink failed, so
+# auto mode copies straight away there instead of trying the ioctl per file.
+reflink_unsupported = set()
+
+
+def list_files(root):
+    files = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for name in sorted(file_names):
+            files.append(os.path.relpath(os.path.join(dir_path, name), root))
+    return files
+
+def file_unchanged(src_path, dst_path, checksum=False):
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_path)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if checksum and hash_file(src_path) == hash_file(dst_path):
+        shutil.copystat(src_path, dst_path)
+        return True
+    return False
+
+def reflink(src_path, dst_path):
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform", dst_path)
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(dst_path)
+            raise
+    shutil.copystat(src_path, dst_path)
+
+def place_file(src_path, dst_path, link="auto"):
+    if link not in link_modes:
+        raise ValueError(f"Invalid link mode: {link}")
+
+    # Never write through an existing file: it may be a hardlink back into static/.
+    if os.path.lexists(dst_path):
+        os.remove(dst_path)
+
+    if link == "hardlink":
+        os.link(src_path, dst_path)
+        return
+    if link == "reflink":
+        reflink(src_path, dst_path)
+        return
+    if link == "auto":
+        device = os.stat(os.path.dirname(dst_path) or ".").st_dev
+        if device not in reflink_unsupported:
+            try:
+                reflink(src_path, dst_path)
+                return
+            except OSError:
+                reflink_unsupported.add(device)
+    shutil.copy2(src_path, dst_path)
+
+def remove_empty_parents(path, root):
+    parent = os.path.dirname(path)
+    while parent and os.path.abspath(parent) != os.path.abspath(root):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            return
+        parent = os.path.dirname(parent)
+
+def remove_unlisted(root, keep):
+    # Full builds no longer wipe the output directory, so anything this build
+    # did not produce is cleared out afterwards instead.
+    keep = set(keep)
+    removed = []
+    for rel_path in list_files(root):
+        if rel_path not in keep:
+            path = os.path.join(root, rel_path)
+            os.remove(path)
+            remove_empty_parents(path, root)
+            removed.append(path)
+    return removed
+
+def sync_directory(src, dst, previous=(), checksum=False, link="auto"):
+    current = list_files(src)
+    copied = 0
+    unchanged = 0
+
+    for rel_path in current:
+        src_path = os.path.join(src, rel_path)
+        dst_path = os.path.join(dst, rel_path)
+        if file_unchanged(src_path, dst_path, checksum):
+            unchanged += 1
+            continue
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        place_file(src_path, dst_path, link)
+        copied += 1
+        print(f"Copied file: {src_path}")
+
+    removed = 0
+    for rel_path in sorted(set(previous) - set(current)):
+        dst_path = os.path.join(dst, rel_path)
+        if os.path.lexists(dst_path):
+            os.remove(dst_path)
+            remove_empty_parents(dst_path, dst)
+            removed += 1
+            print(f"Removed stale file: {dst_path}")
+
+    print(f"Assets synced: {copied} copied, {unchanged} unchanged, {removed} removed")
+    return current
@@ -0,0 +1,81 @@
+import argparse
+import random
+import re
+import time
+
+from block_markdown import block_to_block_type
+
+
+def legacy_block_to_block_type(block):
+    # The classifier as it was before module-level patterns and the single
+    # pass over lines, kept here as the baseline.
+    heading = re.findall(r'^(#{1,6})\s+(.*)', block)
+
+    if heading:
+        return "heading"
+    elif block[:3] == '```' and block[len(block)-3:] == '```':
+        return "code"
+    else:
+        count = 0
+        block_type = ''
+        lines = block.split('\n')
+        for i, line in enumerate(lines):
+            if line[0] == '>':
+                block_type = "quote"
+                count += 1
+            elif line[:2] == '* ' or line[:2] == '- ':
+                block_type = "unordered_list"
+                count += 1
+            elif line[:3] == f"{i+1}. ":
+                block_type = "ordered_list"
+                count += 1
+        if count == len(lines):
+            return block_type
+        else:
+            return "paragraph"
+
+def synthetic_blocks(count, seed=0):
+    rng = random.Random(seed)
+    line = "the road goes ever on and on down from the door where it began"
+    makers = (
+        lambda: "#" * rng.randint(1, 6) + " " + line,
+        lambda: "```\n" + "\n".join(line for _ in range(rng.randint(1, 6))) + "\n```",
+        lambda: "\n".join("> " + line for _ in range(rng.randint(1, 4))),
+        lambda: "\n".join("* " + line for _ in range(rng.randint(1, 8))),
+        lambda: "\n".join(f"{i + 1}. " + line for i in range(rng.randint(1, 9))),
+        lambda: "\n".join(line for _ in range(rng.randint(1, 6))),
+    )
+    weights = (2, 1, 1, 1, 1, 5)
+    return [rng.choices(makers, weights)[0]() for _ in range(count)]
+
+def time_classifier(classify, blocks, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for block in blocks:
+            classify(block)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare block classification speed on synthetic blocks")
+    parser.add_argument("--blocks", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    blocks = synthetic_blocks(args.blocks, args.seed)
+    mismatches = sum(1 for block in blocks if block_to_block_type(block) != legacy_block_to_block_type(block))
+    if mismatches:
+        raise Exception(f"{mismatches} blocks classified differently from the legacy classifier")
+
+    legacy = time_classifier(legacy_block_to_block_type, blocks, args.repeat)
+    current = time_classifier(block_to_block_type, blocks, args.repeat)
+    print(f"{len(blocks)} blocks, best of {args.repeat}")
+    print(f"  legacy:  {legacy:7.3f} s  ({len(blocks) / legacy / 1e6:.2f} M blocks/s)")
+    print(f"  current: {current:7.3f} s  ({len(blocks) / current / 1e6:.2f} M blocks/s)")
+    print(f"  speedup: {legacy / current:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import block_markdown
+from assets import sync_directory
+from block_markdown import block_to_block_type, block_to_html_node, markdown_to_blocks
+from main import collect_pages, copy_directory, extract_title
+from template import Template
+
+default_block_mix = "paragraph=5,heading=2,code=1,quote=1,ulist=1,olist=1"
+default_template = "<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+stages = ("assets", "read", "split", "classify", "inline", "tree", "to_html", "write")
+
+words = (
+    "middle earth ring fellowship shire river mountain elf dwarf wizard "
+    "road tower forest king return shadow light journey song sword"
+).split()
+
+
+def parse_block_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def inline_text(rng, count, density):
+    out = []
+    for i in range(count):
+        word = rng.choice(words)
+        if rng.random() < density:
+            kind = rng.randrange(5)
+            if kind == 0:
+                word = f"**{word}**"
+            elif kind == 1:
+                word = f"*{word}*"
+            elif kind == 2:
+                word = f"`{word}`"
+            elif kind == 3:
+                word = f"[{word}](/{word}/{i})"
+            else:
+                word = f"![{word}](/images/{word}.png)"
+        out.append(word)
+    return " ".join(out)
+
+def synthetic_block(rng, kind, density):
+    if kind == "heading":
+        return "#" * rng.randint(2, 6) + " " + inline_text(rng, 5, density)
+    if kind == "code":
+        return "```\n" + "\n".join(f"line_{i} = {i}" for i in range(rng.randint(2, 8))) + "\n```"
+    if kind == "quote":
+        return "\n".join("> " + inline_text(rng, 10, density) for _ in range(rng.randint(1, 4)))
+    if kind == "ulist":
+        return "\n".join("* " + inline_text(rng, 8, density) for _ in range(rng.randint(2, 8)))
+    if kind == "olist":
+        return "\n".join(f"{i + 1}. " + inline_text(rng, 8, density) for i in range(rng.randint(2, 8)))
+    return "\n".join(inline_text(rng, 12, density) for _ in range(rng.randint(1, 5)))
+
+def synthetic_page(rng, blocks, block_mix, density):
+    kinds = list(block_mix)
+    weights = [block_mix[kind] for kind in kinds]
+    body = [synthetic_block(rng, kind, density) for kind in rng.choices(kinds, weights, k=blocks)]
+    return "\n\n".join(["# " + inline_text(rng, 4, 0)] + body) + "\n"
+
+def generate_corpus(root, pages, blocks, block_mix, density, depth, assets, asset_size, seed=0):
+    rng = random.Random(seed)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+    for i in range(pages):
+        parts = [f"section{(i >> (level * 3)) % 8}" for level in range(depth)]
+        page_dir = os.path.join(content_dir, *parts)
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, f"page{i}.md"), 'w') as file:
+            file.write(synthetic_page(rng, blocks, block_mix, density))
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    for i in range(assets):
+        with open(os.path.join(static_dir, "images", f"image{i}.bin"), 'wb') as file:
+            file.write(rng.randbytes(asset_size))
+    return content_dir, static_dir
+
+@contextlib.contextmanager
+def timed_module_function(module, name, totals, stage):
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            totals[stage] += time.perf_counter() - started
+
+    setattr(module, name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+def time_assets(static_dir, public_dir, totals):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        copy_directory(static_dir, public_dir)
+    totals["assets"] += time.perf_counter() - started
+
+    # The second sync is the no-op case an incremental build hits when no
+    # asset changed; the first one only brings mtimes in line.
+    with contextlib.redirect_stdout(io.StringIO()):
+        previous = sync_directory(static_dir, public_dir, link="copy")
+        started = time.perf_counter()
+        sync_directory(static_dir, public_dir, previous, link="copy")
+    return time.perf_counter() - started
+
+def time_pages(pages, template, totals):
+    input_bytes = 0
+    output_bytes = 0
+    per_page = []
+    nested = {"classify": 0.0, "inline": 0.0}
+
+    # block_to_html_node classifies through classify_block, so that is what is
+    # timed to keep classification out of the "tree" stage.
+    with timed_module_function(block_markdown, "classify_block", nested, "classify"), \
+            timed_module_function(block_markdown, "text_to_textnodes", nested, "inline"), \
+            contextlib.redirect_stdout(io.StringIO()):
+        for src_path, dst_path in pages:
+            page_started = time.perf_counter()
+
+            started = time.perf_counter()
+            with open(src_path, 'r') as file:
+                markdown = file.read()
+            totals["read"] += time.perf_counter() - started
+            input_bytes += len(markdown.encode())
+
+            started = time.perf_counter()
+            blocks = markdown_to_blocks(markdown)
+            totals["split"] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            for block in blocks:
+                block_to_block_type(block)
+            totals["classify"] += time.perf_counter() - started
+
+            nested["classify"] = nested["inline"] = 0.0
+            started = time.perf_counter()
+            nodes = [block_to_html_node(block) for block in blocks]
+            build_time = time.perf_counter() - started
+            totals["inline"] += nested["inline"]
+            totals["tree"] += build_time - nested["inline"] - nested["classify"]
+
+            started = time.perf_counter()
+            html = "".join(node.to_html() for node in nodes)
+            totals["to_html"] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            with open(dst_path, 'w') as file:
+                template.render_to(file, {"Title": extract_title(markdown), "Content": html})
+            totals["write"] += time.perf_counter() - started
+            output_bytes += os.path.getsize(dst_path)
+
+            per_page.append((time.perf_counter() - page_started, src_path))
+
+    return input_bytes, output_bytes, per_page
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+def run_benchmark(args):
+    totals = dict.fromkeys(stages, 0.0)
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, static_dir = generate_corpus(
+            root, args.pages, args.blocks, parse_block_mix(args.block_mix),
+            args.inline_density, args.depth, args.assets, args.asset_size, args.seed,
+        )
+        public_dir = os.path.join(root, "public")
+        pages = collect_pages(content_dir, public_dir)
+        template = Template.parse(default_template)
+
+        if args.trace_memory:
+            tracemalloc.start()
+        resync = time_assets(static_dir, public_dir, totals)
+        started = time.perf_counter()
+        input_bytes, output_bytes, per_page = time_pages(pages, template, totals)
+        page_time = time.perf_counter() - started
+        traced_peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+        tracemalloc.stop()
+
+    per_page.sort(reverse=True)
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "pages": args.pages,
+            "blocks": args.blocks,
+            "block_mix": args.block_mix,
+            "inline_density": args.inline_density,
+            "depth": args.depth,
+            "assets": args.assets,
+            "asset_size": args.asset_size,
+            "seed": args.seed,
+        },
+        "stages": totals,
+        "asset_resync": resync,
+        "page_seconds": page_time,
+        "pages_per_second": len(pages) / page_time if page_time else None,
+        "input_mb_per_second": input_bytes / 2**20 / page_time if page_time else None,
+        "output_mb_per_second": output_bytes / 2**20 / page_time if page_time else None,
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "traced_peak_bytes": traced_peak,
+        "slowest_pages": [[seconds, os.path.basename(path)] for seconds, path in per_page[:5]],
+    }
+
+def print_report(result, baseline=None):
+    print(f"commit {result['commit']}, {result['config']['pages']} pages, python {result['python']}")
+    for stage in stages:
+        line = f"  {stage:>9}: {result['stages'][stage] * 1000:10.1f} ms"
+        if baseline and baseline["stages"].get(stage):
+            line += f"  ({result['stages'][stage] / baseline['stages'][stage]:.2f}x baseline)"
+        print(line)
+    print(f"  asset resync: {result['asset_resync'] * 1000:.1f} ms")
+    print(f"  {result['pages_per_second']:.1f} pages/s, "
+          f"{result['input_mb_per_second']:.2f} MB/s in, {result['output_mb_per_second']:.2f} MB/s out")
+    print(f"  max RSS {result['max_rss_kib'] / 2**10:.1f} MiB", end="")
+    if result["traced_peak_bytes"] is not None:
+        print(f", traced peak {result['traced_peak_bytes'] / 2**20:.1f} MiB", end="")
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each build stage over a synthetic content tree")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--block-mix", default=default_block_mix, help="relative weight of each block type")
+    parser.add_argument("--inline-density", type=float, default=0.2, help="fraction of words with inline markup")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting depth of the content tree")
+    parser.add_argument("--assets", type=int, default=20)
+    parser.add_argument("--asset-size", type=int, default=256 * 1024, help="bytes per static asset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="record the tracemalloc peak (slower)")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+
+if __name__ == '__main__':
+    main()
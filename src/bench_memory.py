@@ -0,0 +1,83 @@
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+import block_markdown
+import inline_markdown
+import leafnode
+import parentnode
+import textnode
+from block_markdown import markdown_to_html_node
+
+
+def synthetic_page(sections):
+    blocks = []
+    for i in range(sections):
+        blocks.append(f"## Section {i}")
+        blocks.append(
+            f"Paragraph {i} has **bold**, *italic* and `code` spans, "
+            f"a [link](/page/{i}) and an ![image](/images/{i}.png) in it."
+        )
+        blocks.append("\n".join(f"* item {j} with *emphasis*" for j in range(5)))
+        blocks.append("\n".join(f"{j + 1}. step {j} with `code`" for j in range(5)))
+    return "\n\n".join(blocks)
+
+def use_instance_dicts():
+    # Subclasses that don't declare __slots__ get a per-instance __dict__ again,
+    # which reproduces the memory layout from before the node classes had slots.
+    text_node = type("TextNode", (textnode.TextNode,), {})
+    leaf_node = type("LeafNode", (leafnode.LeafNode,), {})
+    parent_node = type("ParentNode", (parentnode.ParentNode,), {})
+    inline_markdown.TextNode = text_node
+    textnode.LeafNode = leaf_node
+    block_markdown.ParentNode = parent_node
+
+def measure(sections, dicts):
+    if dicts:
+        use_instance_dicts()
+    markdown = synthetic_page(sections)
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "layout": "dict" if dicts else "slots",
+        "sections": sections,
+        "blocks": len(node.children),
+        "traced_peak_bytes": peak,
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def run_isolated(sections, dicts):
+    command = [sys.executable, __file__, "--sections", str(sections), "--child"]
+    if dicts:
+        command.append("--dicts")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of building the node tree for one large page")
+    parser.add_argument("--sections", type=int, default=20000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--dicts", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.sections, args.dicts)))
+        return
+
+    before = run_isolated(args.sections, True)
+    after = run_isolated(args.sections, False)
+    for result in (before, after):
+        print(
+            f"{result['layout']:>5}: {result['traced_peak_bytes'] / 2**20:8.1f} MiB traced peak, "
+            f"{result['max_rss_kib'] / 2**10:8.1f} MiB max RSS ({result['blocks']} blocks)"
+        )
+    saved = 1 - after["traced_peak_bytes"] / before["traced_peak_bytes"]
+    print(f"slots save {saved:.0%} of traced peak")
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
+import io
 import re
+import time
 from htmlnode import HTMLNode
 from inline_markdown import text_to_textnodes
 from parentnode import ParentNode
@@ -12,63 +14,214 @@ block_type_olist = "ordered_list"
 block_type_ulist = "unordered_list"
 
 
+def iter_blocks(lines):
+    # A blank line ends a block, which is exactly where splitting the whole
+    # text on "\n\n" would cut it, so blocks can be yielded as soon as they end.
+    block = []
+    for line in lines:
+        if line == "\n":
+            text = "".join(block).strip()
+            if text:
+                yield text
+            block = []
+        else:
+            block.append(line)
+    text = "".join(block).strip()
+    if text:
+        yield text
+
+def iter_numbered_blocks(lines, number=1):
+    # iter_blocks, plus the line number each block starts on, for messages
+    # that point back into the source. number is that of the first line.
+    block = []
+    start = None
+    for line in lines:
+        if line == "\n":
+            if start is not None:
+                yield start, "".join(block).strip()
+            block = []
+            start = None
+        else:
+            if start is None and line.strip():
+                start = number
+            block.append(line)
+        number += 1
+    if start is not None:
+        yield start, "".join(block).strip()
+
 def markdown_to_blocks(markdown):
-    new_blocks = markdown.split("\n\n")
-    new_blocks = [block.strip() for block in new_blocks]
-    new_blocks = [block for block in new_blocks if block]
-    return new_blocks
+    return list(iter_blocks(io.StringIO(markdown)))
 
-def block_to_block_type(block):
-    heading = re.findall(r'^(#{1,6})\s+(.*)', block)
-    
-    if heading:
-        return block_type_heading
-    elif block[:3] == '```' and block[len(block)-3:] == '```': 
-        return block_type_code
-    else:
-        count = 0
-        block_type = ''
-        lines = block.split('\n')
-        for i, line in enumerate(lines):
-            if line[0] == '>':
-                block_type = block_type_quote
-                count += 1
-            elif line[:2] == '* ' or line[:2] == '- ':
-                block_type = block_type_ulist
-                count += 1
-            elif line[:3] == f"{i+1}. ":
-                block_type = block_type_olist
-                count += 1
-        if count == len(lines):
-            return block_type
+heading_pattern = re.compile(r'#{1,6}\s')
+heading_slug_pattern = re.compile(r'[\W_]+')
+# The id of a rendered heading, quoted or (minified) bare.
+heading_id_pattern = re.compile(r'<h[1-6] id=(?:"([^"]*)"|([^\s">]+))')
+heading_tags = ("h1", "h2", "h3", "h4", "h5", "h6")
+olist_item_pattern = re.compile(r'(\d+)\. ')
+ulist_prefixes = ('* ', '- ')
+
+def classify_block(block):
+    # Returns the block type together with the block's lines so the converter
+    # doesn't have to split the block a second time.
+    if heading_pattern.match(block):
+        return block_type_heading, None
+    if block.startswith('```') and block.endswith('```'):
+        return block_type_code, None
+
+    lines = block.split('\n')
+    first = lines[0]
+    if first.startswith('>'):
+        if all(line.startswith('>') for line in lines):
+            return block_type_quote, lines
+    elif first.startswith(ulist_prefixes):
+        if all(line.startswith(ulist_prefixes) for line in lines):
+            return block_type_ulist, lines
+    elif first.startswith('1. '):
+        number = 0
+        for line in lines:
+            number += 1
+            match = olist_item_pattern.match(line)
+            if match is None or int(match.group(1)) != number:
+                break
         else:
-            return block_type_paragraph
+            return block_type_olist, lines
+    return block_type_paragraph, lines
+
+def block_to_block_type(block):
+    return classify_block(block)[0]
         
+class HeadingIds:
+    # The heading ids a page has used so far. Blocks are rendered (and cached)
+    # on their own, so a repeated heading repeats its id until the page is put
+    # together; the repeats then get "-1", "-2", ... appended.
+    def __init__(self):
+        self.seen = set()
+
+    def unique(self, slug):
+        candidate = slug
+        number = 0
+        while candidate in self.seen:
+            number += 1
+            candidate = f"{slug}-{number}"
+        self.seen.add(candidate)
+        return candidate
+
+    def fix_node(self, node):
+        if node.tag in heading_tags and node.props and "id" in node.props:
+            node.props["id"] = self.unique(node.props["id"])
+        return node
+
+    def fix_html(self, html):
+        match = heading_id_pattern.match(html)
+        if match is None:
+            return html
+        group = 1 if match.group(1) is not None else 2
+        slug = match.group(group)
+        unique = self.unique(slug)
+        if unique == slug:
+            return html
+        return html[:match.start(group)] + unique + html[match.end(group):]
+
+    def __repr__(self):
+        return f"HeadingIds({len(self.seen)})"
+
 def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
+    ids = HeadingIds()
     children = []
     for block in blocks:
-        html_node = block_to_html_node(block)
+        html_node = ids.fix_node(block_to_html_node(block))
         children.append(html_node)
     return ParentNode("div", children, None)
 
+def write_markdown_html(lines, fp, stats=None, cache=None):
+    if stats is not None:
+        return write_markdown_html_profiled(lines, fp, stats, cache)
+    ids = HeadingIds()
+    fp.write("<div>")
+    if cache is None:
+        for block in iter_blocks(lines):
+            ids.fix_node(block_to_html_node(block)).write_html(fp)
+    else:
+        for block in iter_blocks(lines):
+            fp.write(ids.fix_html(cached_block_html(block, cache)))
+    fp.write("</div>")
+
+def cached_block_html(block, cache):
+    key, html = cache.get(block)
+    if html is None:
+        html = block_to_html_node(block).to_html()
+        cache.put(key, html)
+    return html
+
+def write_markdown_html_profiled(lines, fp, stats, cache=None):
+    ids = HeadingIds()
+    fp.write("<div>")
+    blocks = iter_blocks(lines)
+    while True:
+        started = time.perf_counter()
+        block = next(blocks, None)
+        read = time.perf_counter()
+        stats.stages["read"] += read - started
+        if block is None:
+            break
+        html = None
+        if cache is not None:
+            key, html = cache.get(block)
+        node = None
+        if html is None:
+            node = block_to_html_node(block)
+            parsed = time.perf_counter()
+            html = node.to_html()
+            if cache is not None:
+                cache.put(key, html)
+        else:
+            parsed = time.perf_counter()
+        fp.write(ids.fix_html(html))
+        stats.stages["parse"] += parsed - read
+        stats.stages["render"] += time.perf_counter() - parsed
+        if node is None:
+            stats.blocks["cached"] += 1
+        else:
+            stats.record_block(node)
+    fp.write("</div>")
+
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+    block_type, lines = classify_block(block)
     if block_type == block_type_paragraph:
-        return paragraph_to_html_node(block)
+        return paragraph_to_html_node(block, lines)
     elif block_type == block_type_heading:
         return heading_to_html_node(block)
     elif block_type == block_type_code:
         return code_to_html_node(block)
     elif block_type == block_type_olist:
-        return olist_to_html_node(block)
+        return olist_to_html_node(block, lines)
     elif block_type == block_type_ulist:
-        return ulist_to_html_node(block)
+        return ulist_to_html_node(block, lines)
     elif block_type == block_type_quote:
-        return quote_to_html_node(block)
+        return quote_to_html_node(block, lines)
     else:
         raise ValueError("Invalid block type")
         
+def block_to_textnodes(block):
+    # The inline nodes a block is rendered from, with its block syntax (heading
+    # marks, fences, list and quote prefixes) stripped the same way the
+    # converters below strip it.
+    block_type, lines = classify_block(block)
+    if block_type == block_type_heading:
+        texts = [block.lstrip("#")[1:]]
+    elif block_type == block_type_code:
+        texts = [block[4:-3]]
+    elif block_type == block_type_olist:
+        texts = [line.split(". ", 1)[1] for line in lines]
+    elif block_type == block_type_ulist:
+        texts = [line[2:] for line in lines]
+    elif block_type == block_type_quote:
+        texts = [" ".join(line.lstrip(">").strip() for line in lines)]
+    else:
+        texts = [" ".join(lines)]
+    return [node for text in texts for node in text_to_textnodes(text)]
+
 def text_to_children(text):
     text_nodes = text_to_textnodes(text)
     children = []        
@@ -77,8 +230,9 @@ def text_to_children(text):
         children.append(html_node)
     return children
         
-def paragraph_to_html_node(block):
-    lines = block.split('\n')
+def paragraph_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split('\n')
     paragraph = ' '.join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
@@ -93,8 +247,15 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"Invalid heading level: {level}") 
     text = block[level + 1:]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    text_nodes = text_to_textnodes(text)
+    children = [text_node_to_html_node(text_node) for text_node in text_nodes]
+    # The id is what "#fragment" links to the heading use. It is derived from
+    # the block alone, so cached blocks keep it; a repeated heading repeats it.
+    slug = heading_slug("".join(text_node.text for text_node in text_nodes))
+    return ParentNode(f"h{level}", children, {"id": slug} if slug else None)
+
+def heading_slug(text):
+    return heading_slug_pattern.sub("-", text.lower()).strip("-")
 
 def code_to_html_node(block):
     if not block.startswith("```") or not block.endswith("```"):
@@ -104,17 +265,19 @@ def code_to_html_node(block):
     code = ParentNode('code', children)
     return ParentNode('pre', [code])
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def olist_to_html_node(block, items=None):
+    if items is None:
+        items = block.split("\n")
     html_items = []
     for item in items:
-        text = item[3:]
+        text = item.split(". ", 1)[1]
         children = text_to_children(text)
         html_items.append(ParentNode('li', children))
     return ParentNode("ol", html_items)
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(block, items=None):
+    if items is None:
+        items = block.split("\n")
     html_items = []
     for item in items:
         text = item[2:]
@@ -122,14 +285,14 @@ def ulist_to_html_node(block):
         html_items.append(ParentNode('li', children))
     return ParentNode("ul", html_items)
 
-def quote_to_html_node(block):
-    lines = block.split('\n')
+def quote_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split('\n')
     new_lines = []
     for line in lines:
         if not line.startswith('>'):
             raise ValueError("Invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    print(content)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
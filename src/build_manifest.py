@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+from inline_markdown import link_pattern
+
+manifest_version = 4
+# Recorded in place of a hash for a linked static file that doesn't exist yet,
+# so the page is rebuilt once it does.
+missing_input = "missing"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_markdown(path):
+    # Hashes the source and collects its link URLs a line at a time, so memory
+    # stays bounded by the longest line. Links never span lines, so this finds
+    # the same ones a scan of the whole text would.
+    digest = hashlib.sha256()
+    urls = []
+    with open(path, 'rb') as file:
+        for line in file:
+            digest.update(line)
+            if b"](" in line:
+                urls.extend(url for _, url in link_pattern.findall(line.decode()))
+    return digest.hexdigest(), urls
+
+def expects_static_file(url_path):
+    # Links to other pages have no extension or an HTML one; anything else is
+    # taken to be a static file even while it doesn't exist.
+    return posixpath.splitext(url_path)[1].lower() not in ("", ".html", ".htm")
+
+def linked_static_files(urls, page_url, static_dir, include_missing=False):
+    files = []
+    base = posixpath.dirname(page_url) + "/"
+    for url in urls:
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path:
+            continue
+        url_path = posixpath.normpath(posixpath.join(base, parts.path))
+        path = os.path.join(static_dir, *url_path.lstrip("/").split("/"))
+        if path not in files and (os.path.isfile(path) or (include_missing and expects_static_file(url_path))):
+            files.append(path)
+    return files
+
+
+class InputHashes:
+    def __init__(self):
+        self.hashes = {}
+
+    def get(self, path):
+        digest = self.hashes.get(path)
+        if digest is None:
+            digest = self.hashes[path] = hash_file(path)
+        return digest
+
+    def set(self, path, digest):
+        self.hashes[path] = digest
+
+
+class SourceCache:
+    # Something read out of each page source (its search terms, its links),
+    # kept with the hash of the source it was read from, so a rebuild only
+    # reads the pages that changed. entries is updated in place, which lets it
+    # live inside the manifest.
+    def __init__(self, entries: dict = None):
+        self.entries = entries if entries is not None else {}
+        self.read = 0
+
+    def get(self, src_path, src_hash, read):
+        entry = self.entries.get(src_path)
+        if entry is None or src_hash is None or entry[0] != src_hash:
+            entry = self.entries[src_path] = [src_hash, read(src_path)]
+            self.read += 1
+        return entry[1]
+
+    def prune(self, src_paths):
+        keep = set(src_paths)
+        for src_path in [src_path for src_path in self.entries if src_path not in keep]:
+            del self.entries[src_path]
+
+    def __repr__(self):
+        return f"SourceCache(pages: {len(self.entries)}, read: {self.read})"
+
+
+class BuildManifest:
+    def __init__(self, pages: dict = None, assets: list = None, index: dict = None, sources: dict = None):
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else []
+        # Site index state (see site_index.SiteIndex), kept only with --site-index.
+        self.index = index if index is not None else {}
+        # SourceCache entries by name, for the search index and the link check.
+        self.sources = sources if sources is not None else {}
+        self.seen = set()
+
+    def source_cache(self, name):
+        return SourceCache(self.sources.setdefault(name, {}))
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != manifest_version:
+            return cls()
+        return cls(data.get("pages", {}), data.get("assets", []), data.get("index", {}), data.get("sources", {}))
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            data = {
+                "version": manifest_version, "pages": self.pages, "assets": self.assets, "index": self.index,
+                "sources": self.sources,
+            }
+            json.dump(data, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def changes(self, src_path, inputs, dest_path):
+        entry = self.pages.get(src_path)
+        if entry is None:
+            return ["new page"]
+        reasons = []
+        if entry["dest"] != dest_path or not os.path.exists(dest_path):
+            reasons.append(f"output {dest_path} missing")
+        recorded = entry["inputs"]
+        for path, digest in inputs.items():
+            if path not in recorded:
+                reasons.append(f"{path} added as a dependency")
+            elif recorded[path] != digest:
+                reasons.append(f"{path} changed")
+        for path in recorded:
+            if path not in inputs:
+                reasons.append(f"{path} no longer a dependency")
+        return reasons
+
+    def keep(self, src_path):
+        self.seen.add(src_path)
+
+    def record(self, src_path, dest_path, inputs, reasons):
+        self.pages[src_path] = {"dest": dest_path, "inputs": inputs, "reasons": reasons}
+        self.seen.add(src_path)
+
+    def dependents(self, path):
+        return {src_path for src_path, entry in self.pages.items() if path in entry["inputs"]}
+
+    def find(self, path):
+        if path in self.pages:
+            return path
+        for src_path, entry in self.pages.items():
+            if entry["dest"] == path:
+                return src_path
+        return None
+
+    def forget(self, src_path):
+        entry = self.pages.pop(src_path, None)
+        self.seen.discard(src_path)
+        if entry is None:
+            return None
+        if os.path.exists(entry["dest"]):
+            os.remove(entry["dest"])
+        return entry["dest"]
+
+    def prune(self):
+        removed = []
+        for src_path in sorted(set(self.pages) - self.seen):
+            dest_path = self.pages.pop(src_path)["dest"]
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            removed.append(dest_path)
+        self.seen = set()
+        return removed
+
+    def __repr__(self):
+        return f"BuildManifest(pages: {len(self.pages)}, assets: {len(self.assets)})"
@@ -0,0 +1,110 @@
+import json
+import os
+import time
+from collections import Counter
+
+from parentnode import ParentNode
+
+page_stages = ("read", "parse", "render", "template", "write")
+
+block_tag_types = {
+    "p": "paragraph",
+    "h1": "heading", "h2": "heading", "h3": "heading",
+    "h4": "heading", "h5": "heading", "h6": "heading",
+    "pre": "code",
+    "blockquote": "quote",
+    "ol": "ordered_list",
+    "ul": "unordered_list",
+}
+inline_tag_types = {
+    None: "text",
+    "b": "bold",
+    "i": "italic",
+    "code": "code",
+    "a": "link",
+    "img": "image",
+}
+
+
+class PageStats:
+    def __init__(self, path: str, clock=time.perf_counter):
+        self.path = path
+        self.clock = clock
+        self.pid = os.getpid()
+        self.stages = dict.fromkeys(page_stages, 0.0)
+        self.blocks = Counter()
+        self.inline = Counter()
+        self.started = None
+        self.total = 0.0
+
+    def begin(self):
+        self.started = self.clock()
+
+    def end(self):
+        self.total = self.clock() - self.started
+        accounted = sum(seconds for stage, seconds in self.stages.items() if stage != "template")
+        self.stages["template"] = max(0.0, self.total - accounted)
+
+    def record_block(self, node):
+        self.blocks[block_tag_types.get(node.tag, node.tag)] += 1
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, ParentNode):
+                stack.extend(current.children)
+            else:
+                self.inline[inline_tag_types.get(current.tag, current.tag)] += 1
+
+    def __repr__(self):
+        return f"PageStats({self.path}, {self.total * 1000:.1f} ms)"
+
+
+class BuildProfile:
+    def __init__(self):
+        self.pages = []
+
+    def add(self, stats):
+        self.pages.append(stats)
+
+    def totals(self):
+        totals = dict.fromkeys(page_stages, 0.0)
+        blocks = Counter()
+        inline = Counter()
+        for stats in self.pages:
+            for stage, seconds in stats.stages.items():
+                totals[stage] += seconds
+            blocks.update(stats.blocks)
+            inline.update(stats.inline)
+        return totals, blocks, inline
+
+    def report(self, top=10):
+        totals, blocks, inline = self.totals()
+        print(f"Profiled {len(self.pages)} pages")
+        for stage in page_stages:
+            print(f"  {stage:>8}: {totals[stage] * 1000:10.1f} ms")
+        print("  blocks: " + ", ".join(f"{name}={count}" for name, count in blocks.most_common()))
+        print("  inline: " + ", ".join(f"{name}={count}" for name, count in inline.most_common()))
+        print(f"Slowest {min(top, len(self.pages))} pages:")
+        for stats in sorted(self.pages, key=lambda stats: stats.total, reverse=True)[:top]:
+            print(f"  {stats.total * 1000:8.1f} ms  {stats.path}")
+
+    def write_trace(self, path):
+        # Chrome trace-event format, loadable in chrome://tracing or Perfetto.
+        events = []
+        for stats in self.pages:
+            events.append({
+                "name": stats.path,
+                "cat": "page",
+                "ph": "X",
+                "ts": stats.started * 1e6,
+                "dur": stats.total * 1e6,
+                "pid": stats.pid,
+                "tid": stats.pid,
+                "args": {
+                    **{f"{stage}_ms": seconds * 1000 for stage, seconds in stats.stages.items()},
+                    "blocks": dict(stats.blocks),
+                    "inline": dict(stats.inline),
+                },
+            })
+        with open(path, 'w') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
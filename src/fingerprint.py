@@ -0,0 +1,94 @@
+import json
+import os
+import posixpath
+
+from assets import file_unchanged, place_file, remove_empty_parents
+from build_manifest import hash_file
+
+fingerprint_length = 8
+asset_manifest_name = "asset-manifest.json"
+
+
+def fingerprinted_name(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:fingerprint_length]}{ext}"
+
+def asset_url(rel_path):
+    return "/" + rel_path.replace(os.sep, "/")
+
+
+class AssetHashes:
+    # Content hashes of static files keyed by path, reused while the file's
+    # size and mtime are unchanged so untouched assets aren't read again.
+    def __init__(self, entries: dict = None):
+        self.entries = entries if entries is not None else {}
+        self.hashed = 0
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, 'r') as file:
+                return cls(json.load(file))
+        except (OSError, ValueError):
+            return cls()
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def get(self, path):
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = hash_file(path)
+        self.entries[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        self.hashed += 1
+        return digest
+
+    def __repr__(self):
+        return f"AssetHashes(entries: {len(self.entries)}, hashed: {self.hashed})"
+
+
+def load_asset_manifest(path):
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def fingerprint_assets(src, dst, files, hashes, checksum=False, link="auto"):
+    manifest_path = os.path.join(dst, asset_manifest_name)
+    previous = load_asset_manifest(manifest_path)
+
+    urls = {}
+    outputs = []
+    for rel_path in files:
+        src_path = os.path.join(src, rel_path)
+        name = fingerprinted_name(rel_path, hashes.get(src_path))
+        dst_path = os.path.join(dst, name)
+        if not file_unchanged(src_path, dst_path, checksum):
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            place_file(src_path, dst_path, link)
+            print(f"Fingerprinted file: {src_path} -> {dst_path}")
+        urls[asset_url(rel_path)] = asset_url(name)
+        outputs.append(name)
+
+    for url in sorted(set(previous.values()) - set(urls.values())):
+        dst_path = os.path.join(dst, *posixpath.relpath(url, "/").split("/"))
+        if os.path.lexists(dst_path):
+            os.remove(dst_path)
+            remove_empty_parents(dst_path, dst)
+            print(f"Removed stale file: {dst_path}")
+
+    if urls != previous:
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(urls, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+    outputs.append(asset_manifest_name)
+    return urls, outputs
@@ -0,0 +1,111 @@
+import os
+import re
+from datetime import date
+
+front_matter_fence = "---"
+front_matter_ends = ("---", "...")
+key_pattern = re.compile(r'([A-Za-z_][\w-]*)\s*:(?:\s+(.*))?$')
+title_pattern = re.compile(r'^#\s+(.*)')
+booleans = {"true": True, "yes": True, "on": True, "false": False, "no": False, "off": False}
+# Only these keys are flags; everywhere else "yes" or "no" is just text (a
+# post titled "Yes", say).
+boolean_keys = ("draft",)
+
+
+def parse_scalar(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text.startswith("[") and text.endswith("]"):
+        return [parse_scalar(item) for item in text[1:-1].split(",") if item.strip()]
+    return text
+
+def parse_front_matter(lines):
+    # The YAML subset pages use: "key: value" pairs with quoted or bare
+    # scalars, [inline, lists] and "- item" block lists. Scalars stay strings
+    # except for the boolean keys.
+    metadata = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and line[0] in " \t-":
+            if not isinstance(metadata[key], list):
+                metadata[key] = []
+            metadata[key].append(parse_scalar(stripped[2:]))
+            continue
+        match = key_pattern.match(stripped)
+        if match is None:
+            raise ValueError(f"Invalid front matter line: {line.rstrip()}")
+        key, value = match.group(1).lower(), match.group(2)
+        metadata[key] = parse_scalar(value) if value else []
+    for key in boolean_keys:
+        value = metadata.get(key)
+        if isinstance(value, str):
+            metadata[key] = booleans.get(value.lower(), value)
+    return metadata
+
+def read_front_matter(file):
+    # Reads only the header. Leaves the file positioned at the start of the
+    # body and returns the metadata with that offset.
+    first = file.readline()
+    if first.rstrip("\r\n") != front_matter_fence:
+        file.seek(0)
+        return {}, 0
+    lines = []
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError("Front matter is not closed")
+        if line.rstrip("\r\n") in front_matter_ends:
+            break
+        lines.append(line)
+    return parse_front_matter(lines), file.tell()
+
+def read_header(path):
+    # Just the front matter: enough to skip drafts and pick the template.
+    with open(path, 'r') as file:
+        return read_front_matter(file)[0]
+
+def find_title(lines):
+    for line in lines:
+        match = title_pattern.match(line)
+        if match:
+            return match.group(1).strip()
+    raise Exception("No h1 header found")
+
+def file_date(path):
+    # The date of a page without a "date:" in its header. It follows the file's
+    # mtime, so builds record it as an input of the page (see main.page_inputs).
+    return date.fromtimestamp(os.path.getmtime(path)).isoformat()
+
+def normalize_metadata(metadata, path):
+    tags = metadata.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",")]
+    metadata["tags"] = [str(tag) for tag in tags if str(tag)]
+    metadata["draft"] = metadata.get("draft") is True
+    if metadata.get("title") is not None:
+        metadata["title"] = str(metadata["title"])
+    if not metadata.get("date"):
+        metadata["date"] = file_date(path)
+    else:
+        metadata["date"] = str(metadata["date"])
+    return metadata
+
+def read_metadata(file, path, require_title=True):
+    metadata, body_start = read_front_matter(file)
+    if not metadata.get("title"):
+        # A draft may not have a title yet; that only matters once it's built.
+        if require_title or metadata.get("draft") is not True:
+            metadata["title"] = find_title(iter(file.readline, ""))
+        else:
+            metadata["title"] = None
+    return normalize_metadata(metadata, path), body_start
+
+def scan_metadata(path):
+    # Metadata without parsing the body: the header, plus the lines up to the
+    # first "# " heading when there is no title in it.
+    with open(path, 'r') as file:
+        return read_metadata(file, path, require_title=False)[0]
@@ -1,16 +1,30 @@
+import minify
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag: str = None, value: str = None, children: list = None, props: dict = None):
         self.tag = tag
         self.value = value 
         self.children = children
         self.props = props
         
-    def to_html(self):
+    def iter_html(self):
         raise NotImplementedError()
+
+    def write_html(self, fp):
+        write = fp.write
+        for chunk in self.iter_html():
+            write(chunk)
+
+    def to_html(self):
+        return "".join(self.iter_html())
     
     def props_to_html(self):
         props_str = ""
         if self.props is not None:
+            if minify.enabled:
+                return "".join(minify.attribute(key, value) + " " for key, value in self.props.items())
             for key, value in self.props.items():
                 props_str += f'{key}="{value}" '
         return props_str
@@ -0,0 +1,290 @@
+import json
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from assets import file_unchanged, place_file, remove_empty_parents
+from fingerprint import asset_url
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+image_extensions = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+default_widths = (480, 960)
+image_manifest_name = "image-manifest.json"
+
+png_signature = b"\x89PNG\r\n\x1a\n"
+# PNG colour type -> channels, for the 8-bit images the pure-Python backend handles.
+png_channels = {0: 1, 2: 3, 4: 2, 6: 4}
+png_color_types = {channels: color_type for color_type, channels in png_channels.items()}
+jpeg_frame_markers = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class UnsupportedImage(Exception):
+    pass
+
+# What a damaged or unexpected image file raises while being read or resized:
+# Pillow raises OSError (UnidentifiedImageError is one) or ValueError, the
+# pure-Python reader struct and zlib errors on truncated data.
+image_errors = (UnsupportedImage, OSError, ValueError, struct.error, zlib.error)
+if Image is not None:
+    image_errors += (Image.DecompressionBombError,)
+
+
+def backend_name():
+    return "pillow" if Image is not None else "pure-python png"
+
+def image_size(path):
+    # Dimensions straight from the file header, so every image gets width and
+    # height attributes whether or not it can be resized here.
+    with open(path, 'rb') as file:
+        head = file.read(32)
+        if head.startswith(png_signature) and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return webp_size(head + file.read(32))
+        if head[:2] == b"\xff\xd8":
+            file.seek(2)
+            return jpeg_size(file)
+    return None
+
+def webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        b0, b1, b2, b3 = head[21:25]
+        return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+    if chunk == b"VP8X":
+        return 1 + int.from_bytes(head[24:27], "little"), 1 + int.from_bytes(head[27:30], "little")
+    return None
+
+def jpeg_size(file):
+    while True:
+        marker = file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length = struct.unpack(">H", file.read(2))[0]
+        if marker[1] in jpeg_frame_markers:
+            height, width = struct.unpack(">xHH", file.read(5))
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+def read_png(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(png_signature):
+        raise UnsupportedImage(f"{path} is not a PNG")
+    position = len(png_signature)
+    header = None
+    compressed = []
+    while position < len(data):
+        length, kind = struct.unpack(">I4s", data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            compressed.append(body)
+        elif kind == b"IEND":
+            break
+        position += 12 + length
+
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or color_type not in png_channels or interlace:
+        raise UnsupportedImage(f"{path}: only non-interlaced 8-bit grey, RGB and alpha PNGs can be resized without Pillow")
+    channels = png_channels[color_type]
+    raw = zlib.decompress(b"".join(compressed))
+    stride = width * channels
+    rows = []
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        row = unfilter(raw[start], bytearray(raw[start + 1:start + 1 + stride]), previous, channels)
+        rows.append(row)
+        previous = row
+    return width, height, channels, rows
+
+def unfilter(filter_type, row, previous, bpp):
+    if filter_type == 0:
+        return row
+    if filter_type == 1:
+        for i in range(bpp, len(row)):
+            row[i] = (row[i] + row[i - bpp]) & 0xFF
+        return row
+    if filter_type == 2:
+        return bytearray((a + b) & 0xFF for a, b in zip(row, previous))
+    if filter_type == 3:
+        for i in range(len(row)):
+            left = row[i - bpp] if i >= bpp else 0
+            row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        return row
+    if filter_type == 4:
+        for i in range(len(row)):
+            a = row[i - bpp] if i >= bpp else 0
+            b = previous[i]
+            c = previous[i - bpp] if i >= bpp else 0
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            if pa <= pb and pa <= pc:
+                predictor = a
+            elif pb <= pc:
+                predictor = b
+            else:
+                predictor = c
+            row[i] = (row[i] + predictor) & 0xFF
+        return row
+    raise UnsupportedImage(f"Invalid PNG filter type: {filter_type}")
+
+def box_ranges(size, new_size):
+    return [(i * size // new_size, max(i * size // new_size + 1, (i + 1) * size // new_size)) for i in range(new_size)]
+
+def resize_rows(rows, width, height, channels, new_width, new_height):
+    # Box filter: each output pixel is the average of the source pixels it
+    # covers, done as a horizontal and then a vertical pass.
+    columns = box_ranges(width, new_width)
+    narrow = []
+    for row in rows:
+        out = bytearray(new_width * channels)
+        for x, (x0, x1) in enumerate(columns):
+            count = x1 - x0
+            for channel in range(channels):
+                out[x * channels + channel] = sum(row[x0 * channels + channel:x1 * channels:channels]) // count
+        narrow.append(out)
+    resized = []
+    for y0, y1 in box_ranges(height, new_height):
+        count = y1 - y0
+        resized.append(bytearray(total // count for total in map(sum, zip(*narrow[y0:y1]))))
+    return resized
+
+def png_chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+def write_png(path, width, height, channels, rows):
+    header = struct.pack(">IIBBBBB", width, height, 8, png_color_types[channels], 0, 0, 0)
+    # Every row uses the "up" filter, which suits photographs well enough.
+    raw = bytearray()
+    previous = bytes(width * channels)
+    for row in rows:
+        raw.append(2)
+        raw += bytes((a - b) & 0xFF for a, b in zip(row, previous))
+        previous = row
+    with open(path, 'wb') as file:
+        file.write(png_signature)
+        file.write(png_chunk(b"IHDR", header))
+        file.write(png_chunk(b"IDAT", zlib.compress(bytes(raw), 9)))
+        file.write(png_chunk(b"IEND", b""))
+
+def resize_image(src_path, dst_path, width, height):
+    if Image is not None:
+        with Image.open(src_path) as image:
+            image_format = image.format
+            if image.mode == "P":
+                image = image.convert("RGBA")
+            image.resize((width, height), Image.LANCZOS).save(dst_path, format=image_format, optimize=True)
+        return
+    if not src_path.lower().endswith(".png"):
+        raise UnsupportedImage(f"{src_path}: resizing non-PNG images needs Pillow")
+    src_width, src_height, channels, rows = read_png(src_path)
+    write_png(dst_path, width, height, channels, resize_rows(rows, src_width, src_height, channels, width, height))
+
+
+def variant_height(width, height, new_width):
+    return max(1, round(height * new_width / width))
+
+def process_image(job):
+    # Returns the image size, its variants, how many were resized, and the
+    # error that stopped resizing, if any; the page then uses the original.
+    src_path, digest, widths, cache_dir = job
+    try:
+        size = image_size(src_path)
+    except image_errors as e:
+        return None, [], 0, str(e)
+    if size is None:
+        return None, [], 0, None
+    width, height = size
+    ext = os.path.splitext(src_path)[1]
+    variants = []
+    resized = 0
+    for new_width in widths:
+        if new_width >= width:
+            continue
+        cache_path = os.path.join(cache_dir, f"{digest[:16]}-{new_width}w{ext}")
+        if not os.path.exists(cache_path):
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            try:
+                resize_image(src_path, tmp_path, new_width, variant_height(width, height, new_width))
+            except image_errors as e:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return size, [], resized, str(e)
+            os.replace(tmp_path, cache_path)
+            resized += 1
+        variants.append((new_width, cache_path))
+    return size, variants, resized, None
+
+def load_image_manifest(path):
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return []
+
+def process_images(src, dst, files, hashes, widths=default_widths, cache_dir=".image-cache", jobs=1, link="auto"):
+    os.makedirs(cache_dir, exist_ok=True)
+    images = [rel_path for rel_path in files if rel_path.lower().endswith(image_extensions)]
+    work = [
+        (os.path.join(src, rel_path), hashes.get(os.path.join(src, rel_path)), sorted(widths), cache_dir)
+        for rel_path in images
+    ]
+    if jobs == 1 or len(work) < 2:
+        results = list(map(process_image, work))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(process_image, work))
+
+    variants = {}
+    outputs = []
+    resized = 0
+    for rel_path, (_, digest, _, _), (size, sized_variants, count, error) in zip(images, work, results):
+        if error is not None:
+            print(f"Could not resize {os.path.join(src, rel_path)}, using the original: {error}")
+        if size is None:
+            continue
+        resized += count
+        root, ext = os.path.splitext(rel_path)
+        srcset = []
+        for new_width, cache_path in sized_variants:
+            name = f"{root}.{digest[:8]}.{new_width}w{ext}"
+            dst_path = os.path.join(dst, name)
+            if not file_unchanged(cache_path, dst_path):
+                os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+                place_file(cache_path, dst_path, link)
+            srcset.append([asset_url(name), new_width])
+            outputs.append(name)
+        variants[asset_url(rel_path)] = {"width": size[0], "height": size[1], "srcset": srcset}
+
+    manifest_path = os.path.join(dst, image_manifest_name)
+    for rel_path in sorted(set(load_image_manifest(manifest_path)) - set(outputs)):
+        dst_path = os.path.join(dst, rel_path)
+        if os.path.lexists(dst_path):
+            os.remove(dst_path)
+            remove_empty_parents(dst_path, dst)
+            print(f"Removed stale file: {dst_path}")
+    if load_image_manifest(manifest_path) != outputs:
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(outputs, file, indent=1)
+        os.replace(tmp_path, manifest_path)
+
+    print(f"Images: {len(variants)} sized, {resized} variants resized, {len(outputs) - resized} from cache ({backend_name()})")
+    outputs.append(image_manifest_name)
+    return variants, outputs
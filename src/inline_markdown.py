@@ -1,6 +1,19 @@
 import re
 from textnode import *
 
+image_pattern = re.compile(r"!\[(.*?)\]\((.*?)\)")
+link_pattern = re.compile(r"\[(.*?)\]\((.*?)\)")
+inline_token_pattern = re.compile(r"\*\*|[*`]|!?\[")
+# Link and image spans may not contain other inline syntax, which matches the
+# precedence of the delimiter passes that used to run before them.
+inline_image_pattern = re.compile(r"!\[([^\[*`]*?)\]\(([^*`]*?)\)")
+inline_link_pattern = re.compile(r"\[([^\[*`]*?)\]\(([^*`]*?)\)")
+delimiter_text_types = {
+    "**": text_type_bold,
+    "*": text_type_italic,
+    "`": text_type_code,
+}
+
 def split_nodes_delimiter(old_types, delimiter, text_type):
     new_nodes = []
 
@@ -23,10 +36,10 @@ def split_nodes_delimiter(old_types, delimiter, text_type):
     return new_nodes
 
 def extract_markdown_images(text):
-    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    return image_pattern.findall(text)
     
 def extract_markdown_links(text):
-    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+    return link_pattern.findall(text)
 
 def split_nodes_image(old_nodes):
     new_nodes = []
@@ -84,10 +97,42 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, text_type_text)]
-    nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
-    nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
-    nodes = split_nodes_delimiter(nodes, "`", text_type_code)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
\ No newline at end of file
+    # Single left-to-right scan: jump to the next delimiter or bracket and emit
+    # the finished node, instead of re-splitting the node list once per syntax.
+    nodes = []
+    pending = 0
+    position = 0
+    while True:
+        token = inline_token_pattern.search(text, position)
+        if token is None:
+            break
+        start = token.start()
+        delimiter = token.group()
+
+        if delimiter in delimiter_text_types:
+            end = text.find(delimiter, token.end())
+            if end == -1:
+                raise ValueError("Mismatched delimiter found in text node.")
+            if start > pending:
+                nodes.append(TextNode(text[pending:start], text_type_text))
+            nodes.append(TextNode(text[token.end():end], delimiter_text_types[delimiter]))
+            pending = position = end + len(delimiter)
+            continue
+
+        if delimiter == "![":
+            match = inline_image_pattern.match(text, start)
+            text_type = text_type_image
+        else:
+            match = inline_link_pattern.match(text, start)
+            text_type = text_type_link
+        if match is None:
+            position = start + 1
+            continue
+        if start > pending:
+            nodes.append(TextNode(text[pending:start], text_type_text))
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        pending = position = match.end()
+
+    if pending < len(text):
+        nodes.append(TextNode(text[pending:], text_type_text))
+    return nodes
@@ -1,22 +1,33 @@
+import minify
 from htmlnode import HTMLNode
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str = None, value: str = None, props: dict = None):
         if value is None or (tag!='img' and not value):
             raise ValueError("LeafNode must have a value")
         super().__init__(tag, value, None, props)
         
-    def to_html(self):
+    def to_html(self, collapse=None):
+        # collapse is decided by the parent, which knows whether this leaf sits
+        # inside <pre>; on its own a leaf follows the minify setting.
         if self.value is None or (self.tag!='img' and not self.value):
             raise ValueError("All leaf nodes must have a value")
-        elif not self.tag:
-            return f"{self.value}"
+        value = self.value
+        if (minify.enabled if collapse is None else collapse) and self.tag not in minify.raw_tags:
+            value = minify.collapse_whitespace(value)
+        if not self.tag:
+            return f"{value}"
         else:
             props = self.props_to_html().strip()
             if self.tag!='img':
-                return f"<{self.tag}{' '+props if props else ''}>{self.value}</{self.tag}>"
+                return f"<{self.tag}{' '+props if props else ''}>{value}</{self.tag}>"
             else:
-                return f"<{self.tag}{' '+props if props else ''}>{self.value}"
+                return f"<{self.tag}{' '+props if props else ''}>{value}"
+
+    def iter_html(self):
+        yield self.to_html()
             
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
\ No newline at end of file
@@ -0,0 +1,136 @@
+import os
+import posixpath
+import re
+from urllib.parse import unquote, urlsplit
+
+from block_markdown import block_to_textnodes, iter_numbered_blocks
+from front_matter import read_front_matter
+from textnode import text_type_image, text_type_link
+
+id_pattern = re.compile(r"""\sid=(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+
+def output_paths(public_dir, extra=(), files=None):
+    # Every file under public/ as a root-relative URL path, or only files
+    # (paths relative to public/) when given, plus the outputs that only
+    # exist in memory (extra holds their destination paths).
+    paths = set()
+    if files is not None:
+        paths.update("/" + rel_path.replace(os.sep, "/") for rel_path in files)
+    else:
+        for dir_path, _, file_names in os.walk(public_dir):
+            rel_dir = os.path.relpath(dir_path, public_dir).replace(os.sep, "/")
+            prefix = "/" if rel_dir == "." else f"/{rel_dir}/"
+            for name in file_names:
+                paths.add(prefix + name)
+    for dest_path in extra:
+        paths.add("/" + os.path.relpath(dest_path, public_dir).replace(os.sep, "/"))
+    return paths
+
+def page_links(src_path):
+    # (line, kind, url) for every link and image of a page, taken from the
+    # TextNodes its blocks render from so code spans aren't mistaken for links.
+    # The body is streamed block by block, like a page being rendered.
+    with open(src_path, 'r') as file:
+        body_start = read_front_matter(file)[1]
+        file.seek(0)
+        first_line = 1
+        while body_start and file.tell() != body_start and file.readline():
+            first_line += 1
+        for number, block in iter_numbered_blocks(file, first_line):
+            position = 0
+            for node in block_to_textnodes(block):
+                if node.text_type not in (text_type_link, text_type_image):
+                    continue
+                found = block.find(f"]({node.url})", position)
+                if found != -1:
+                    position = found + 1
+                line = number + block.count("\n", 0, max(found, 0))
+                yield line, node.text_type, node.url
+
+def resolve_url(url, page_url):
+    # The output path (and fragment) an internal URL points at, or None for
+    # links off the site.
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    if not parts.path:
+        path = page_url
+    else:
+        base = page_url if page_url.endswith("/") else posixpath.dirname(page_url)
+        path = posixpath.normpath(posixpath.join(base, unquote(parts.path)))
+        if parts.path.endswith("/") and not path.endswith("/"):
+            path += "/"
+    return path, unquote(parts.fragment)
+
+
+class LinkChecker:
+    # Answers "does this URL exist" from a set of output paths built once per
+    # check, so each link costs a couple of set lookups. Element ids are read
+    # from an output only when some link asks for a fragment in it. With an
+    # in-memory writer the site is its pages plus the files it lists, not
+    # whatever else public/ holds.
+    def __init__(self, public_dir: str, writer=None):
+        self.public_dir = public_dir
+        self.writer = writer
+        if writer is not None:
+            self.paths = output_paths(public_dir, writer.pages, writer.files)
+        else:
+            self.paths = output_paths(public_dir)
+        self.ids = {}
+
+    def target(self, path):
+        if path.endswith("/"):
+            path += "index.html"
+        if path in self.paths:
+            return path
+        # Servers redirect a directory without its slash to the slash form.
+        if path + "/index.html" in self.paths:
+            return path + "/index.html"
+        return None
+
+    def element_ids(self, path):
+        ids = self.ids.get(path)
+        if ids is None:
+            dest_path = os.path.join(self.public_dir, *path.lstrip("/").split("/"))
+            entry = self.writer.get(dest_path) if self.writer is not None else None
+            if entry is not None:
+                html = entry[0].decode("utf-8")
+            else:
+                with open(dest_path, 'r', encoding="utf-8", errors="replace") as file:
+                    html = file.read()
+            ids = self.ids[path] = {"".join(filter(None, match.groups())) for match in id_pattern.finditer(html)}
+        return ids
+
+    def check(self, url, page_url):
+        # None when the URL is fine, otherwise why it isn't.
+        resolved = resolve_url(url, page_url)
+        if resolved is None:
+            return None
+        path, fragment = resolved
+        target = self.target(path)
+        if target is None:
+            return f"no output at {path}"
+        if fragment and target.endswith(".html") and fragment not in self.element_ids(target):
+            return f"no element with id {fragment!r} in {target}"
+        return None
+
+    def __repr__(self):
+        return f"LinkChecker(outputs: {len(self.paths)})"
+
+
+def check_links(pages, public_dir, writer=None, links=page_links):
+    # pages are (src_path, url); links returns the (line, kind, url) of a
+    # page's links, cached by the caller if it likes. Returns how many links
+    # were seen (links off the site count but aren't checked) and the broken
+    # ones as (src_path, line, kind, url, reason).
+    checker = LinkChecker(public_dir, writer)
+    checked = 0
+    broken = []
+    for src_path, page_url in pages:
+        for line, kind, url in links(src_path):
+            checked += 1
+            reason = checker.check(url, page_url)
+            if reason is not None:
+                broken.append((src_path, line, kind, url, reason))
+    return checked, broken
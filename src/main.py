@@ -1,8 +1,29 @@
+import argparse
+import hashlib
 import os
 import re
 import shutil
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 
-from block_markdown import markdown_to_html_node
+import asset_urls
+import minify
+from assets import link_modes, remove_unlisted, sync_directory
+from block_markdown import iter_blocks, write_markdown_html
+from build_manifest import BuildManifest, InputHashes, linked_static_files, missing_input, scan_markdown
+from build_profile import BuildProfile, PageStats
+from fingerprint import AssetHashes, asset_manifest_name, fingerprint_assets, load_asset_manifest
+from front_matter import file_date, read_front_matter, read_header, read_metadata
+from images import default_widths, process_images
+from link_check import check_links, page_links
+from page_writer import AtomicFile, PageWriter
+from parse_cache import ParseCache
+from precompress import compressed_suffixes, precompress_directory, precompress_files
+from search_index import build_search_index, page_terms, index_outputs as search_index_outputs, load_index as load_search_index
+from site_index import SiteIndex, write_site_index
+from template import load_template, template_dependencies, template_urls
+from watch import is_under, take_snapshot, wait_for_changes
 
 def copy_directory(src, dst):
     if os.path.exists(dst):
@@ -27,56 +48,674 @@ def extract_title(markdown):
     else:
         raise Exception("No h1 header found")
 
-def generate_page(from_path, template_path, dest_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    
+def generate_page(from_path, template_path, dest_path, log=print, values=None, stats=None, cache=None, writer=None):
+    if stats is not None:
+        stats.begin()
+
     with open(from_path, 'r') as file:
-        markdown_content = file.read()
+        # The title comes before the content in the template, so read the
+        # front matter (or find the first heading with a cheap line scan) and
+        # then stream the body block by block.
+        started = time.perf_counter() if stats is not None else None
+        metadata, body_start = read_metadata(file, from_path)
+        # Every front matter key is a placeholder too ("author" fills
+        # {{ Author }}), but never in place of the built-in ones.
+        page_values = {key.capitalize(): metadata_text(value) for key, value in metadata.items()}
+        page_values.update({
+            "Title": metadata["title"],
+            "Date": metadata["date"],
+            "Tags": ", ".join(metadata["tags"]),
+        })
+        if stats is not None:
+            stats.stages["read"] += time.perf_counter() - started
+        if values:
+            page_values.update(values)
+        page_template = page_template_path(template_path, metadata)
+        log(f"Generating page from {from_path} to {dest_path} using {page_template}")
+        template = load_template(page_template)
+        file.seek(body_start)
+        page_values["Content"] = lambda fp: write_markdown_html(file, fp, stats, cache)
 
-    with open(template_path, 'r') as file:
-        template_content = file.read()
+        # None means the background writer decides later.
+        changed = None
+        if writer is not None:
+            # A writer takes the page as one string: it owns the output once
+            # submit returns, after this file is closed. The full-page buffer
+            # costs at most the writer's max_pending pages of memory, and buys
+            # rendering that doesn't wait on the disk. The profile counts the
+            # hand-off as the write stage; the write itself runs elsewhere.
+            text = template.render(page_values)
+            started = time.perf_counter() if stats is not None else None
+            writer.submit(dest_path, text, from_path)
+            if stats is not None:
+                stats.stages["write"] += time.perf_counter() - started
+        elif stats is None:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            output_file = AtomicFile(dest_path)
+            with output_file as output:
+                template.render_to(output, page_values)
+            changed = output_file.changed
+        else:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            changed = write_page_profiled(template, page_values, dest_path, stats)
 
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
+    if stats is not None:
+        stats.end()
+    if writer is not None:
+        log(f"Page rendered, queued for writing: {dest_path}")
+    elif changed is False:
+        log(f"Page generated, output unchanged: {dest_path}")
+    else:
+        log(f"Page generated: {dest_path}")
+    return changed
 
-    title = extract_title(markdown_content)
+def metadata_text(value):
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    return str(value)
 
-    full_html = template_content.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
+def write_page_profiled(template, page_values, dest_path, stats):
+    started = time.perf_counter()
+    output_file = AtomicFile(dest_path)
+    with output_file as output:
+        stats.stages["write"] += time.perf_counter() - started
+        template.render_to(output, page_values)
+        started = time.perf_counter()
+    stats.stages["write"] += time.perf_counter() - started
+    return output_file.changed
 
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+def page_template_path(template_path, metadata):
+    # A page's "template:" is relative to the directory of the site template.
+    if metadata.get("template"):
+        return os.path.join(os.path.dirname(template_path), metadata["template"])
+    return template_path
 
-    with open(dest_path, 'w') as file:
-        file.write(full_html)
-    
-    print(f"Page generated: {dest_path}")
+# Set by --drafts; otherwise pages with "draft: true" are skipped before they
+# are parsed.
+include_drafts = False
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.makedirs(dest_dir_path)
-    
-    for item in os.listdir(dir_path_content):
+def published_pages(pages):
+    published = []
+    for src_path, dst_path in pages:
+        if not include_drafts and read_header(src_path).get("draft") is True:
+            print(f"Skipping draft: {src_path}")
+        else:
+            published.append((src_path, dst_path))
+    return published
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for item in sorted(os.listdir(dir_path_content)):
         src_path = os.path.join(dir_path_content, item)
         dst_path = os.path.join(dest_dir_path, item)
 
         if os.path.isdir(src_path):
-            generate_pages_recursive(src_path, template_path, dst_path)
+            pages.extend(collect_pages(src_path, dst_path))
         elif src_path.endswith(".md"):
-            dst_path = dst_path.replace(".md", ".html")
-            generate_page(src_path, template_path, dst_path)
+            pages.append((src_path, dst_path.replace(".md", ".html")))
+    return pages
+
+def page_dest_path(src_path, dir_path_content, dest_dir_path):
+    return os.path.join(dest_dir_path, os.path.relpath(src_path, dir_path_content)).replace(".md", ".html")
+
+def page_url(dest_path, dest_dir_path):
+    url = "/" + os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return url
+
+worker_cache = None
+worker_writer = None
+
+def init_worker(cache, writer=None, urls=None, minify_html=None):
+    global worker_cache, worker_writer
+    worker_cache = cache
+    worker_writer = writer
+    if urls is not None:
+        asset_urls.restore(urls)
+    if minify_html is not None:
+        minify.set_minify(minify_html)
+
+def cached_blocks(cache, src_path):
+    # The cache entries of a page's blocks, sent along with the page to the
+    # pool worker rendering it.
+    with open(src_path, 'r') as file:
+        read_front_matter(file)
+        return cache.entries_for(iter_blocks(file))
+
+def render_page_job(job):
+    from_path, template_path, dest_path, values, profile, blocks = job
+    if blocks:
+        worker_cache.merge(blocks)
+    messages = []
+    stats = PageStats(from_path) if profile else None
+    try:
+        changed = generate_page(
+            from_path, template_path, dest_path,
+            log=messages.append, values=values, stats=stats, cache=worker_cache, writer=worker_writer,
+        )
+    except Exception:
+        return messages, traceback.format_exc(), None, None, None
+    cached = worker_cache.take_added() if worker_cache is not None else None
+    return messages, None, stats, cached, changed
+
+def collect_failures(pages, results, profile=None, cache=None, written=None):
+    failures = {}
+    for (src_path, _), (messages, error, stats, cached, changed) in zip(pages, results):
+        for message in messages:
+            print(message)
+        if written is not None and changed is not None:
+            written["written" if changed else "unchanged"] += 1
+        if stats is not None:
+            profile.add(stats)
+        if cached:
+            cache.merge(cached)
+        if error is not None:
+            print(f"Failed to generate page: {src_path}")
+            failures[src_path] = error
+    return failures
+
+def render_pages(pages, template_path, dest_dir_path, jobs=1, profile=None, cache=None, writer_threads=0, writer=None):
+    work = [
+        (src_path, template_path, dst_path, {"Path": page_url(dst_path, dest_dir_path)}, profile is not None, None)
+        for src_path, dst_path in pages
+    ]
+    written = {"written": 0, "unchanged": 0}
+    if writer is not None or jobs == 1 or len(work) < 2:
+        # Pool workers already overlap rendering with their own writes, so the
+        # background writer is only used when rendering in this process. A
+        # writer passed in (the in-memory one used by serve) always is.
+        if writer is None and writer_threads > 0:
+            writer = PageWriter(writer_threads)
+        init_worker(cache, writer)
+        try:
+            failures = collect_failures(pages, map(render_page_job, work), profile, cache, written)
+        finally:
+            init_worker(None)
+            write_failures = writer.close() if writer is not None else {}
+        for src_path, error in write_failures.items():
+            print(f"Failed to write page: {src_path}")
+            failures[src_path] = error
+        if writer is not None:
+            written["written"] += writer.written
+            written["unchanged"] += writer.unchanged
+    else:
+        chunksize = max(1, len(work) // (jobs * 4))
+        pool_cache = None
+        if cache is not None:
+            # Workers start from an empty cache and get the entries of each
+            # page's blocks with the page, rather than a pickle of all of it.
+            work = [job[:-1] + (cached_blocks(cache, job[0]),) for job in work]
+            pool_cache = cache.empty_copy()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(pool_cache, None, asset_urls.snapshot(), minify.enabled)) as pool:
+            results = pool.map(render_page_job, work, chunksize=chunksize)
+            failures = collect_failures(pages, results, profile, cache, written)
+
+    if work:
+        print(f"Pages written: {written['written']} changed, {written['unchanged']} identical to the existing output")
+    return failures
+
+def check_failures(failures, total):
+    if failures:
+        details = "\n".join(f"{src_path}:\n{error}" for src_path, error in failures.items())
+        raise Exception(f"{len(failures)} of {total} pages failed to generate\n{details}")
+
+# Options that change the HTML of every page, recorded as an input of each page
+# so switching them rebuilds everything.
+render_options = ""
+
+def page_inputs(src_path, dst_path, dest_dir_path, template_inputs, static_dir, hashes, metadata=None):
+    src_hash, urls = scan_markdown(src_path)
+    hashes.set(src_path, src_hash)
+    inputs = {src_path: src_hash}
+    if metadata is None:
+        metadata = read_header(src_path)
+    if not metadata.get("date"):
+        # The page's Date then comes from the file's mtime, which a checkout
+        # changes without touching the contents.
+        inputs["date"] = file_date(src_path)
+    if render_options:
+        inputs["build options"] = render_options
+    for path in template_inputs:
+        inputs[path] = hashes.get(path)
+    if static_dir is not None:
+        for path in linked_static_files(urls, page_url(dst_path, dest_dir_path), static_dir, include_missing=True):
+            inputs[path] = hashes.get(path) if os.path.isfile(path) else missing_input
+    return inputs
+
+def template_inputs_of(template_path, static_dir):
+    inputs = template_dependencies(template_path)
+    # Fingerprinted URLs put the asset hashes into every page the template
+    # renders, so the assets it references become inputs of each page.
+    if asset_urls.asset_urls and static_dir is not None:
+        inputs += linked_static_files(template_urls(template_path), "/", static_dir)
+    return inputs
+
+def update_pages(pages, template_path, dest_dir_path, manifest, static_dir=None, jobs=1, profile=None, cache=None, writer_threads=0, writer=None):
+    hashes = InputHashes()
+    template_inputs = {}
+    stale = []
+    for src_path, dst_path in pages:
+        metadata = read_header(src_path)
+        if metadata.get("draft") is True and not include_drafts:
+            forgotten = manifest.forget(src_path)
+            if forgotten is not None and writer is not None:
+                writer.remove(forgotten)
+            print(f"Skipping draft: {src_path}")
+            continue
+        page_template = page_template_path(template_path, metadata)
+        if page_template not in template_inputs:
+            template_inputs[page_template] = template_inputs_of(page_template, static_dir)
+        inputs = page_inputs(src_path, dst_path, dest_dir_path, template_inputs[page_template], static_dir, hashes, metadata)
+        reasons = manifest.changes(src_path, inputs, dst_path)
+        if reasons:
+            stale.append((src_path, dst_path, inputs, reasons))
+        else:
+            manifest.keep(src_path)
+            print(f"Page unchanged: {dst_path}")
+
+    failures = render_pages(
+        [(src_path, dst_path) for src_path, dst_path, _, _ in stale],
+        template_path, dest_dir_path, jobs, profile, cache, writer_threads, writer,
+    )
+    for src_path, dst_path, inputs, reasons in stale:
+        if src_path in failures:
+            manifest.keep(src_path)
+        else:
+            manifest.record(src_path, dst_path, inputs, reasons)
+    return failures
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None, jobs=1, profile=None, cache=None, static_dir=None, writer_threads=0, writer=None):
+    if not os.path.exists(dest_dir_path):
+        os.makedirs(dest_dir_path)
+
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    if manifest is None:
+        pages = published_pages(pages)
+        check_failures(render_pages(pages, template_path, dest_dir_path, jobs, profile, cache, writer_threads, writer), len(pages))
+        return pages
+
+    failures = update_pages(pages, template_path, dest_dir_path, manifest, static_dir, jobs, profile, cache, writer_threads, writer)
+    for dst_path in manifest.prune():
+        if writer is not None:
+            writer.remove(dst_path)
+        print(f"Removed stale page: {dst_path}")
+    check_failures(failures, len(pages))
+    return [(src_path, dst_path) for src_path, dst_path in pages if src_path in manifest.pages]
+
 
+def site_index_context(template_path):
+    hashes = InputHashes()
+    return [render_options, asset_urls.asset_urls_digest] + [hashes.get(path) for path in template_dependencies(template_path)]
+
+def recorded_source(manifest, src_path):
+    # What the manifest last built a page from: its source hash and, for pages
+    # without a "date:", the file date standing in for it.
+    if manifest is None or src_path not in manifest.pages:
+        return None
+    inputs = manifest.pages[src_path]["inputs"]
+    return f"{inputs.get(src_path)} {inputs.get('date', '')}"
+
+def update_site_index(pages, template_path, dest_dir_path, manifest, args, writer=None):
+    # Incremental builds keep the index in the manifest: pages whose recorded
+    # source is unchanged aren't read again, and listings whose entries
+    # are unchanged aren't rendered again. Full builds start from scratch.
+    index = SiteIndex.from_json(manifest.index) if manifest is not None else SiteIndex()
+    scanned = index.update([
+        (src_path, page_url(dst_path, dest_dir_path), recorded_source(manifest, src_path)) for src_path, dst_path in pages
+    ])
+    outputs, written, unchanged = write_site_index(
+        index, dest_dir_path, load_template(template_path), site_index_context(template_path),
+        args.site_url, args.per_page, writer=writer, author=args.site_author,
+    )
+    if writer is not None:
+        # Settles the writer's counts so the next batch of pages reports its own.
+        writer.close()
+    if manifest is not None:
+        manifest.index = index.to_json()
+    print(f"Site index: {scanned} page(s) scanned, {written} output(s) written, {unchanged} unchanged")
+    return [os.path.normpath(path) for path in outputs]
+
+def search_index_source(pages, dest_dir_path, manifest):
+    # Identifies the indexed pages by path, URL and recorded source hash, so an
+    # incremental build with no page changes leaves the index alone. Full
+    # builds have no hashes to hand and always rebuild it.
+    if manifest is None:
+        return None
+    digest = hashlib.sha256()
+    for src_path, dst_path in pages:
+        src_hash = manifest.pages[src_path]["inputs"].get(src_path)
+        digest.update(f"{src_path}\0{page_url(dst_path, dest_dir_path)}\0{src_hash}\n".encode())
+    return digest.hexdigest()
+
+def cached_reader(pages, manifest, name, read):
+    # read, cached in the manifest by each page's source hash: watch and serve
+    # rebuilds then only read the pages that changed. Full builds read all.
+    if manifest is None:
+        return read
+    cache = manifest.source_cache(name)
+    cache.prune(src_path for src_path, _ in pages)
+    return lambda src_path: cache.get(src_path, manifest.pages[src_path]["inputs"].get(src_path), read)
+
+def update_search_index(pages, dest_dir_path, manifest, writer=None):
+    outputs, written = build_search_index(
+        [(src_path, page_url(dst_path, dest_dir_path)) for src_path, dst_path in pages],
+        dest_dir_path, search_index_source(pages, dest_dir_path, manifest), writer=writer,
+        terms=cached_reader(pages, manifest, "search", page_terms),
+    )
+    if writer is not None:
+        writer.close()
+    print(f"Search index: {len(outputs)} file(s), {written} written")
+    return [os.path.normpath(path) for path in outputs]
+
+def check_site_links(pages, dest_dir_path, writer=None, manifest=None):
+    checked, broken = check_links(
+        [(src_path, page_url(dst_path, dest_dir_path)) for src_path, dst_path in pages], dest_dir_path, writer,
+        cached_reader(pages, manifest, "links", lambda src_path: list(page_links(src_path))),
+    )
+    for src_path, line, kind, url, reason in broken:
+        print(f"{src_path}:{line}: broken {kind} {url}: {reason}")
+    print(f"Links checked: {checked}, {len(broken)} broken")
+    return broken
+
+def manifest_pages(manifest):
+    return sorted((src_path, entry["dest"]) for src_path, entry in manifest.pages.items())
+
+def build_render_options(args):
+    options = []
+    if args.fingerprint:
+        options.append("fingerprint")
+    if args.images:
+        options.append("images=" + ",".join(str(width) for width in args.image_widths))
+    if args.minify:
+        options.append("minify")
+    return " ".join(options)
+
+def apply_render_options(args):
+    global render_options, include_drafts
+    render_options = build_render_options(args)
+    include_drafts = args.drafts
+    minify.set_minify(args.minify)
+
+def sync_assets(static_dir, public_dir, previous, args, jobs=1):
+    assets = sync_directory(static_dir, public_dir, previous, args.checksum, args.link)
+    outputs = list(assets)
+    if not args.fingerprint and not args.images:
+        return assets, outputs
+    hashes = AssetHashes.load(args.asset_hashes)
+    if args.fingerprint:
+        urls, fingerprinted = fingerprint_assets(static_dir, public_dir, assets, hashes, args.checksum, args.link)
+        asset_urls.set_asset_urls(urls)
+        outputs += fingerprinted
+    if args.images:
+        variants, resized = process_images(
+            static_dir, public_dir, assets, hashes, args.image_widths, args.image_cache, jobs, args.link,
+        )
+        asset_urls.set_image_variants(variants)
+        outputs += resized
+    hashes.save(args.asset_hashes)
+    return assets, outputs
+
+def rebuild_pages(sources, dir_path_content, template_path, dest_dir_path, manifest, static_dir=None, jobs=1, cache=None, writer=None):
+    pages = [
+        (src_path, page_dest_path(src_path, dir_path_content, dest_dir_path))
+        for src_path in sorted(sources)
+        if src_path.endswith(".md")
+    ]
+    failures = update_pages(pages, template_path, dest_dir_path, manifest, static_dir, jobs, cache=cache, writer=writer)
+    check_failures(failures, len(pages))
+    return pages
+
+def rebuild_changes(changed, removed, content_dir, static_dir, template_path, public_dir, manifest, args, jobs=1, cache=None, writer=None):
+    touched = changed | removed
+    # Outputs (relative to public_dir) this rebuild may have written or
+    # removed; --precompress looks at only these.
+    outputs = []
+    if any(is_under(path, static_dir) for path in touched):
+        outputs += manifest.assets
+        manifest.assets, asset_outputs = sync_assets(static_dir, public_dir, manifest.assets, args, jobs)
+        outputs += asset_outputs
+        if writer is not None:
+            writer.files = set(asset_outputs)
+
+    for src_path in sorted(removed):
+        if src_path.endswith(".md") and is_under(src_path, content_dir):
+            dst_path = manifest.forget(src_path)
+            if dst_path is not None:
+                if writer is not None:
+                    writer.remove(dst_path)
+                outputs.append(os.path.relpath(dst_path, public_dir))
+                print(f"Removed stale page: {dst_path}")
+
+    # Content edits rebuild themselves; any other input rebuilds exactly the
+    # pages the dependency graph says read it.
+    sources = {path for path in changed if is_under(path, content_dir)}
+    for path in touched:
+        sources |= manifest.dependents(path)
+    sources = {path for path in sources if os.path.exists(path)}
+    pages = rebuild_pages(sources, content_dir, template_path, public_dir, manifest, static_dir, jobs, cache, writer)
+    outputs += [os.path.relpath(dst_path, public_dir) for _, dst_path in pages]
+    if args.site_index:
+        outputs += [os.path.normpath(path) for path in manifest.index.get("outputs", {})]
+        outputs += update_site_index(manifest_pages(manifest), template_path, public_dir, manifest, args, writer)
+    if args.search_index:
+        previous = load_search_index(public_dir, writer)
+        if previous is not None:
+            outputs += [os.path.normpath(path) for path in search_index_outputs(previous)]
+        outputs += update_search_index(manifest_pages(manifest), public_dir, manifest, writer)
+    if args.precompress:
+        precompress_files(public_dir, outputs, jobs, args.compress_min_size)
+    if args.check_links:
+        check_site_links(manifest_pages(manifest), public_dir, writer, manifest)
+
+def explain_page(path, template_path, public_dir, static_dir, manifest):
+    src_path = manifest.find(path)
+    if src_path is None:
+        print(f"{path} is not in the build manifest")
+        return
+    entry = manifest.pages[src_path]
+    print(f"{src_path} -> {entry['dest']}")
+    print("Last rebuilt because: " + "; ".join(entry["reasons"]))
+    print("Inputs:")
+    for input_path in sorted(entry["inputs"]):
+        print(f"  {input_path}")
+    if not os.path.exists(src_path):
+        print("Source no longer exists; the output will be removed on the next build")
+        return
+    metadata = read_header(src_path)
+    page_template = page_template_path(template_path, metadata)
+    inputs = page_inputs(
+        src_path, entry["dest"], public_dir, template_inputs_of(page_template, static_dir), static_dir, InputHashes(), metadata,
+    )
+    reasons = manifest.changes(src_path, inputs, entry["dest"])
+    if reasons:
+        print("Next build will rebuild it because: " + "; ".join(reasons))
+    else:
+        print("Up to date")
+
+# Page inputs that aren't files.
+non_file_inputs = ("date", "build options")
+
+def watched_paths(content_dir, static_dir, template_path, manifest):
+    # content/, static/ and the site template's files, plus those of the
+    # templates pages pick with "template:", which the manifest records as
+    # inputs of those pages.
+    paths = [content_dir, static_dir] + template_dependencies(template_path)
+    for entry in manifest.pages.values():
+        for path in entry["inputs"]:
+            if path not in non_file_inputs and not is_under(path, content_dir) and not is_under(path, static_dir):
+                paths.append(path)
+    return list(dict.fromkeys(paths))
+
+def watch_site(content_dir, static_dir, template_path, public_dir, manifest, args, jobs=1, cache=None, writer=None, on_rebuild=None):
+    paths = watched_paths(content_dir, static_dir, template_path, manifest)
+    snapshot = take_snapshot(paths)
+    print("Watching for changes. Press Ctrl+C to stop.")
+    try:
+        while True:
+            snapshot, changed, removed = wait_for_changes(paths, snapshot)
+            started = time.perf_counter()
+            try:
+                rebuild_changes(
+                    changed, removed, content_dir, static_dir, template_path, public_dir, manifest, args, jobs, cache, writer,
+                )
+            except Exception as e:
+                print(f"Rebuild failed: {e}")
+            else:
+                print(f"Rebuilt {len(changed | removed)} changed file(s) in {(time.perf_counter() - started) * 1000:.0f} ms")
+                if on_rebuild is not None:
+                    on_rebuild()
+            # Pages kept in memory are not outputs on disk, so their manifest
+            # must not be mistaken for the one incremental builds use.
+            if writer is None:
+                manifest.save(args.manifest)
+            if cache is not None:
+                cache.save(args.parse_cache_path)
+            # The snapshot wait_for_changes returned stays the baseline, so a
+            # file saved while the rebuild ran is picked up next time round.
+            # Only template files that weren't watched before are added to it.
+            try:
+                latest = watched_paths(content_dir, static_dir, template_path, manifest)
+            except (OSError, ValueError) as e:
+                print(f"Template error: {e}")
+            else:
+                for path in set(paths) - set(latest):
+                    snapshot.pop(path, None)
+                snapshot.update(take_snapshot([path for path in latest if path not in paths]))
+                paths = latest
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+def build_parser(description="Build the static site into public/"):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--incremental", action="store_true",
+                        help="only regenerate pages whose markdown or template changed")
+    parser.add_argument("--manifest", default=".build-manifest.json",
+                        help="path of the incremental build manifest")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes for page rendering (0 = one per CPU)")
+    parser.add_argument("--checksum", action="store_true",
+                        help="in incremental mode, compare asset contents when size matches but mtime differs; "
+                             "without it an asset with the same size and mtime as its copy counts as unchanged")
+    parser.add_argument("--link", choices=link_modes, default="auto",
+                        help="how incremental mode places assets: auto tries a reflink and falls back to copying")
+    parser.add_argument("--writer-threads", type=int, default=0,
+                        help="write pages from a background thread pool so rendering doesn't wait on the disk")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="also publish static files under content-hashed names and point pages and the template at them")
+    parser.add_argument("--asset-hashes", default=".asset-hashes.json",
+                        help="path of the cache of static file hashes used by --fingerprint")
+    parser.add_argument("--images", action="store_true",
+                        help="publish resized copies of static images and give img tags srcset, width, height and lazy loading")
+    parser.add_argument("--image-widths", type=lambda value: [int(width) for width in value.split(",")],
+                        default=list(default_widths), help="comma-separated widths of the resized copies (default 480,960)")
+    parser.add_argument("--image-cache", default=".image-cache",
+                        help="directory of resized images, keyed by source hash")
+    parser.add_argument("--drafts", action="store_true",
+                        help="also build pages whose front matter says draft: true")
+    parser.add_argument("--minify", action="store_true",
+                        help="collapse whitespace and drop optional attribute quotes while writing pages")
+    parser.add_argument("--site-index", action="store_true",
+                        help="also generate paginated archive pages, tag pages, sitemap.xml and an Atom feed")
+    parser.add_argument("--site-url", default="http://localhost:8888",
+                        help="absolute URL of the site, used in sitemap.xml and the feed")
+    parser.add_argument("--site-author",
+                        help="author named in the Atom feed; defaults to the host of --site-url")
+    parser.add_argument("--per-page", type=int, default=10,
+                        help="number of pages listed on each archive page")
+    parser.add_argument("--search-index", action="store_true",
+                        help="write a sharded full-text index of the pages and a small client to search/")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br when the brotli module is installed) copies of text outputs; a copy "
+                             "with its output's mtime counts as current, and watch rebuilds only look at the outputs they touched")
+    parser.add_argument("--compress-min-size", type=int, default=1024,
+                        help="smallest output in bytes that --precompress compresses")
+    parser.add_argument("--check-links", action="store_true",
+                        help="after building, report links and images that point at missing outputs or element ids")
+    parser.add_argument("--parse-cache", action="store_true",
+                        help="reuse rendered HTML for blocks seen in earlier builds")
+    parser.add_argument("--parse-cache-path", default=".parse-cache.json",
+                        help="path of the persistent block cache")
+    parser.add_argument("--parse-cache-size", type=int, default=128,
+                        help="size limit of the block cache in MiB; least recently used blocks are evicted")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each build stage per page and print a summary")
+    parser.add_argument("--profile-top", type=int, default=10,
+                        help="number of slowest pages listed by --profile")
+    parser.add_argument("--trace", help="write a Chrome trace-event JSON file of the build (implies --profile)")
+    parser.add_argument("--explain", metavar="PAGE",
+                        help="show the recorded inputs of a page (source or output path) and why it was rebuilt")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and rebuild changed pages and assets (implies --incremental)")
+    return parser
+
+def parse_args(argv=None):
+    return build_parser().parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.watch:
+        args.incremental = True
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    profile = BuildProfile() if args.profile or args.trace else None
+    cache = ParseCache.load(args.parse_cache_path, args.parse_cache_size * 2**20) if args.parse_cache else None
 
-def main():
     source_dir = 'static'
     public_dir = 'public'
-    
-    copy_directory(source_dir, public_dir)
-    print("Directory copy completed.")
-    
     markdown_path = 'content'
     template_path = 'template.html'
     dest_path = 'public'
 
-    generate_pages_recursive(markdown_path, template_path, dest_path)
+    apply_render_options(args)
+
+    if args.explain:
+        manifest = BuildManifest.load(args.manifest)
+        if args.fingerprint:
+            asset_urls.set_asset_urls(load_asset_manifest(os.path.join(public_dir, asset_manifest_name)))
+        explain_page(args.explain, template_path, dest_path, source_dir, manifest)
+        return
+
+    manifest = BuildManifest.load(args.manifest) if args.incremental else None
+
+    # Full builds sync into the existing output rather than wiping it, so files
+    # that come out identical keep their mtimes for rsync and CDN uploads.
+    previous_assets = manifest.assets if manifest is not None else ()
+    assets, asset_outputs = sync_assets(source_dir, public_dir, previous_assets, args, jobs)
+    if manifest is not None:
+        manifest.assets = assets
+    print("Directory copy completed.")
+
+    try:
+        pages = generate_pages_recursive(
+            markdown_path, template_path, dest_path, manifest, jobs, profile, cache, source_dir, args.writer_threads,
+        )
+        index_outputs = update_site_index(pages, template_path, dest_path, manifest, args) if args.site_index else []
+        if args.search_index:
+            index_outputs += update_search_index(pages, dest_path, manifest)
+        if manifest is None:
+            outputs = asset_outputs + [os.path.relpath(dst_path, public_dir) for _, dst_path in pages] + index_outputs
+            if args.precompress:
+                outputs += [output + suffix for output in outputs for suffix in compressed_suffixes()]
+            for path in remove_unlisted(public_dir, outputs):
+                print(f"Removed stale file: {path}")
+        if args.precompress:
+            precompress_directory(public_dir, jobs, args.compress_min_size)
+        if args.check_links:
+            check_site_links(pages, dest_path, manifest=manifest)
+    finally:
+        if manifest is not None:
+            manifest.save(args.manifest)
+        if cache is not None:
+            cache.save(args.parse_cache_path)
+
+    if profile is not None:
+        profile.report(args.profile_top)
+        if args.trace:
+            profile.write_trace(args.trace)
+            print(f"Trace written to {args.trace}")
+
+    if args.watch:
+        watch_site(markdown_path, source_dir, template_path, dest_path, manifest, args, jobs, cache)
   
 if __name__ == '__main__':
     main()
\ No newline at end of file
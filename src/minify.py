@@ -0,0 +1,93 @@
+import re
+
+# Set from the command line; read by the node serializers and the template
+# loader so minification happens while the HTML is written, not afterwards.
+enabled = False
+
+# Content of these elements is written exactly as given.
+raw_tags = frozenset(("pre", "code", "textarea", "script", "style"))
+# Whitespace next to these tags never renders, so it can be dropped entirely.
+block_tags = frozenset((
+    "!doctype", "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript",
+    "article", "section", "nav", "header", "footer", "main", "aside", "div", "p", "ul", "ol", "li",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "table", "thead", "tbody", "tr", "td", "th",
+    "hr", "br", "form", "figure", "figcaption",
+))
+
+# Only ASCII whitespace is insignificant; \s would also eat non-breaking spaces.
+whitespace_pattern = re.compile(r"[ \t\n\r\f]+")
+unquoted_value_pattern = re.compile(r"[^ \t\n\r\f\"'=<>`{}]+")
+markup_token_pattern = re.compile(r"<!--.*?-->|<(/?)(!?[A-Za-z][\w:-]*)([^>]*)>|[^<]+|<", re.DOTALL)
+attribute_pattern = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?|/""")
+
+
+def set_minify(value):
+    global enabled
+    enabled = bool(value)
+
+def collapse_whitespace(text):
+    return whitespace_pattern.sub(" ", text)
+
+def attribute(key, value):
+    value = str(value)
+    if enabled and unquoted_value_pattern.fullmatch(value):
+        return f"{key}={value}"
+    return f'{key}="{value}"'
+
+def minify_tag(name, attributes):
+    parts = [name]
+    for match in attribute_pattern.finditer(attributes):
+        key, double, single, bare = match.groups()
+        if key is None:
+            parts.append("/")
+        elif double is None and single is None and bare is None:
+            parts.append(key)
+        elif double is not None and "{{" not in double:
+            parts.append(attribute(key, double))
+        else:
+            parts.append(match.group(0))
+    return "<" + " ".join(parts) + ">"
+
+def minify_markup(html):
+    # For template markup: collapse whitespace in text, drop it around block
+    # tags, drop comments and unneeded attribute quotes, and copy raw elements
+    # through untouched. Template placeholders are treated as text.
+    tokens = []
+    raw_until = None
+    for match in markup_token_pattern.finditer(html):
+        token = match.group(0)
+        closing, name, attributes = match.groups()
+        if raw_until is not None:
+            tokens.append(("raw", token))
+            if closing and name.lower() == raw_until:
+                tokens[-1] = ("tag", name.lower(), token)
+                raw_until = None
+            continue
+        if token.startswith("<!--"):
+            if token.startswith("<!--[if"):
+                tokens.append(("raw", token))
+        elif name is not None:
+            tag = name.lower()
+            if closing:
+                tokens.append(("tag", tag, f"</{name}>"))
+            else:
+                tokens.append(("tag", tag, minify_tag(name, attributes)))
+                if tag in raw_tags:
+                    raw_until = tag
+        else:
+            tokens.append(("text", token))
+
+    out = []
+    for index, token in enumerate(tokens):
+        if token[0] != "text":
+            out.append(token[-1])
+            continue
+        text = collapse_whitespace(token[1])
+        previous = tokens[index - 1] if index > 0 else None
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if previous is None or (previous[0] == "tag" and previous[1] in block_tags):
+            text = text.lstrip(" ")
+        if following is None or (following[0] == "tag" and following[1] in block_tags):
+            text = text.rstrip(" ")
+        out.append(text)
+    return "".join(out)
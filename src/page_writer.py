@@ -0,0 +1,153 @@
+import filecmp
+import hashlib
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+write_buffer_size = 1 << 20
+
+
+def same_contents(path, data):
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, 'rb') as file:
+            return file.read() == data
+    except FileNotFoundError:
+        return False
+
+
+class AtomicFile:
+    # Write next to the destination and rename over it, so readers never see a
+    # half-written page and a failed render leaves the old page in place. When
+    # the new output is byte-identical the old file is kept, mtime and all.
+    def __init__(self, dest_path: str, buffer_size: int = write_buffer_size):
+        self.dest_path = dest_path
+        self.tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.buffer_size = buffer_size
+        self.file = None
+        self.changed = None
+
+    def __enter__(self):
+        self.file = open(self.tmp_path, 'w', buffering=self.buffer_size, encoding="utf-8")
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is None:
+            self.changed = not (os.path.exists(self.dest_path) and filecmp.cmp(self.tmp_path, self.dest_path, shallow=False))
+            if self.changed:
+                os.replace(self.tmp_path, self.dest_path)
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        return False
+
+
+def write_atomic(dest_path, text, buffer_size=write_buffer_size):
+    data = text.encode("utf-8")
+    if same_contents(dest_path, data):
+        return False
+    tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb', buffering=buffer_size) as file:
+            file.write(data)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+class PageWriter:
+    def __init__(self, threads: int = 4, max_pending: int = 64, buffer_size: int = write_buffer_size):
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="page-writer")
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.buffer_size = buffer_size
+        self.created_dirs = set()
+        self.dirs_lock = threading.Lock()
+        self.futures = []
+        self.written = 0
+        self.unchanged = 0
+
+    def ensure_dir(self, dir_path):
+        if dir_path in self.created_dirs:
+            return
+        with self.dirs_lock:
+            if dir_path not in self.created_dirs:
+                os.makedirs(dir_path, exist_ok=True)
+                self.created_dirs.add(dir_path)
+
+    def write(self, dest_path, text):
+        self.ensure_dir(os.path.dirname(dest_path))
+        return write_atomic(dest_path, text, self.buffer_size)
+
+    def submit(self, dest_path, text, key=None):
+        # Blocks once max_pending pages are queued so rendered pages can't pile
+        # up in memory faster than the disk takes them.
+        self.pending.acquire()
+        future = self.pool.submit(self.write, dest_path, text)
+        future.add_done_callback(lambda _: self.pending.release())
+        self.futures.append((key if key is not None else dest_path, future))
+
+    def close(self):
+        failures = {}
+        for key, future in self.futures:
+            try:
+                changed = future.result()
+            except Exception:
+                failures[key] = traceback.format_exc()
+                continue
+            if changed:
+                self.written += 1
+            else:
+                self.unchanged += 1
+        self.futures = []
+        self.pool.shutdown()
+        return failures
+
+    def __repr__(self):
+        return f"PageWriter(pending: {len(self.futures)})"
+
+
+class MemoryWriter:
+    # Keeps rendered pages in memory instead of on disk, for the preview
+    # server. Same submit/close interface as PageWriter.
+    def __init__(self):
+        self.pages = {}
+        # The outputs that do live on disk (synced assets, fingerprinted copies,
+        # image variants) as paths relative to public/. Anything else there is
+        # left over from some other build and not part of this site.
+        self.files = set()
+        self.lock = threading.Lock()
+        self.written = 0
+        self.unchanged = 0
+        self.batch = [0, 0]
+
+    def submit(self, dest_path, text, key=None):
+        data = text.encode("utf-8")
+        etag = '"' + hashlib.blake2b(data, digest_size=12).hexdigest() + '"'
+        with self.lock:
+            previous = self.pages.get(dest_path)
+            if previous is not None and previous[1] == etag:
+                self.batch[1] += 1
+                return
+            self.pages[dest_path] = (data, etag)
+            self.batch[0] += 1
+
+    def get(self, dest_path):
+        return self.pages.get(dest_path)
+
+    def remove(self, dest_path):
+        with self.lock:
+            self.pages.pop(dest_path, None)
+
+    def close(self):
+        with self.lock:
+            self.written, self.unchanged = self.batch
+            self.batch = [0, 0]
+        return {}
+
+    def __repr__(self):
+        return f"MemoryWriter(pages: {len(self.pages)})"
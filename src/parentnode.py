@@ -1,6 +1,10 @@
+import minify
 from htmlnode import HTMLNode
+from leafnode import LeafNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str = None, children: list = None, props: dict = None):
         if not children:
             raise ValueError("ParentNode must have children")
@@ -8,17 +12,35 @@ class ParentNode(HTMLNode):
             raise ValueError("ParentNode must have a tag")
         super().__init__(tag, None, children, props)
         
-    def to_html(self):
+    def start_tag(self):
         if not self.tag:
             raise ValueError("All parent nodes must have a tag")
         elif not self.children:
             raise ValueError("All parent nodes must have children")
-        else:
-            props = self.props_to_html().strip()
-            front_tag =  f"<{self.tag}{' '+props if props else ''}>"
-            for child in self.children:
-                front_tag += child.to_html()
-            return front_tag + f"</{self.tag}>"
+        props = self.props_to_html().strip()
+        return f"<{self.tag}{' '+props if props else ''}>"
+
+    def iter_html(self):
+        # Walk with an explicit stack so deep trees neither recurse nor re-copy
+        # their children's markup at every level.
+        # When minifying, raw counts the open <pre>/<code> elements whose text
+        # must keep its whitespace.
+        yield self.start_tag()
+        raw = minify.enabled and self.tag in minify.raw_tags
+        stack = [(self.tag, iter(self.children), raw)]
+        while stack:
+            tag, children, raw = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                yield f"</{tag}>"
+            elif isinstance(child, ParentNode):
+                yield child.start_tag()
+                stack.append((child.tag, iter(child.children), raw or child.tag in minify.raw_tags))
+            elif isinstance(child, LeafNode):
+                yield child.to_html(minify.enabled and not raw)
+            else:
+                yield from child.iter_html()
         
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
\ No newline at end of file
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import asset_urls
+import block_markdown
+import htmlnode
+import inline_markdown
+import leafnode
+import minify
+import parentnode
+import textnode
+
+parser_modules = (asset_urls, block_markdown, inline_markdown, textnode, htmlnode, leafnode, parentnode, minify)
+
+
+def parser_version():
+    # Any edit to the parser or the node classes changes the rendered HTML, so
+    # their source is the version key.
+    digest = hashlib.sha256()
+    for module in parser_modules:
+        with open(module.__file__, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+def block_key(block):
+    digest = hashlib.blake2b(block.encode(), digest_size=16)
+    # Links and images render through the fingerprinted asset URLs, so those
+    # blocks are keyed by the URL mapping too.
+    if asset_urls.asset_urls_digest and "](" in block:
+        digest.update(asset_urls.asset_urls_digest.encode())
+    if minify.enabled:
+        digest.update(b"minify")
+    return digest.hexdigest()
+
+
+def html_bytes(html):
+    # The cache limit is in bytes; most blocks are ASCII, which skips encoding.
+    return len(html) if html.isascii() else len(html.encode())
+
+
+class ParseCache:
+    def __init__(self, max_bytes: int = 128 * 2**20, version: str = None):
+        self.max_bytes = max_bytes
+        self.version = version if version is not None else parser_version()
+        self.entries = OrderedDict()
+        self.size = 0
+        self.added = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path, max_bytes=128 * 2**20):
+        cache = cls(max_bytes)
+        if not os.path.exists(path):
+            return cache
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cache
+        if data.get("version") != cache.version:
+            return cache
+        for key, html in data.get("entries", []):
+            cache.store(key, html)
+        return cache
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({"version": self.version, "entries": list(self.entries.items())}, file)
+        os.replace(tmp_path, path)
+
+    def get(self, block):
+        key = block_key(block)
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return key, None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return key, html
+
+    def put(self, key, html):
+        self.store(key, html)
+        self.added[key] = html
+
+    def store(self, key, html):
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= html_bytes(previous)
+        self.entries[key] = html
+        self.size += html_bytes(html)
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= html_bytes(evicted)
+
+    def take_added(self):
+        added = self.added
+        self.added = {}
+        return added
+
+    def entries_for(self, blocks):
+        # The cached HTML of the given blocks, leaving the counters and the
+        # eviction order alone. A pool worker gets these with the page it
+        # renders instead of a copy of the whole cache.
+        found = {}
+        for block in blocks:
+            key = block_key(block)
+            html = self.entries.get(key)
+            if html is not None:
+                found[key] = html
+        return found
+
+    def empty_copy(self):
+        return ParseCache(self.max_bytes, self.version)
+
+    def merge(self, entries):
+        for key, html in entries.items():
+            self.store(key, html)
+
+    def __repr__(self):
+        return f"ParseCache(entries: {len(self.entries)}, {self.size} bytes, hits: {self.hits}, misses: {self.misses})"
@@ -0,0 +1,110 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from assets import list_files
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+compressible_extensions = (".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map", ".webmanifest")
+
+
+def gzip_compress(data):
+    # mtime=0 keeps the output byte-identical between builds.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+def compressors():
+    found = {".gz": gzip_compress}
+    if brotli is not None:
+        found[".br"] = brotli_compress
+    return found
+
+def compressed_suffixes():
+    return list(compressors())
+
+def is_compressible(path):
+    return path.endswith(compressible_extensions)
+
+def compressed_is_current(path, compressed_path):
+    # Compressed copies carry their source's mtime, and unchanged outputs keep
+    # theirs, so equal mtimes mean the copy is up to date.
+    try:
+        return os.stat(compressed_path).st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def compress_file(job):
+    path, suffix = job
+    compressed_path = path + suffix
+    if compressed_is_current(path, compressed_path):
+        return False
+    stat = os.stat(path)
+    with open(path, 'rb') as file:
+        data = compressors()[suffix](file.read())
+    tmp_path = f"{compressed_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path, compressed_path)
+    return True
+
+def precompress_directory(root, jobs=1, min_size=1024):
+    suffixes = compressed_suffixes()
+    files = list_files(root)
+    work = []
+    expected = set()
+    for rel_path in files:
+        path = os.path.join(root, rel_path)
+        if is_compressible(rel_path) and os.path.getsize(path) >= min_size:
+            for suffix in suffixes:
+                work.append((path, suffix))
+                expected.add(rel_path + suffix)
+
+    # Drop copies whose source is gone, fell under the threshold, or whose
+    # encoding is no longer produced.
+    removed = 0
+    for rel_path in files:
+        base, suffix = os.path.splitext(rel_path)
+        if suffix in (".gz", ".br") and is_compressible(base) and rel_path not in expected:
+            os.remove(os.path.join(root, rel_path))
+            removed += 1
+
+    report(compress_all(work, jobs), len(work), removed, suffixes)
+    return sorted(expected)
+
+def precompress_files(root, rel_paths, jobs=1, min_size=1024):
+    # precompress_directory for just the given outputs (paths relative to
+    # root), so a watch rebuild doesn't walk all of public/. Copies of outputs
+    # that are gone or fell under the threshold are removed.
+    suffixes = compressed_suffixes()
+    work = []
+    removed = 0
+    for rel_path in sorted(set(rel_paths)):
+        if not is_compressible(rel_path):
+            continue
+        path = os.path.join(root, rel_path)
+        keep = os.path.exists(path) and os.path.getsize(path) >= min_size
+        for suffix in (".gz", ".br"):
+            if keep and suffix in suffixes:
+                work.append((path, suffix))
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
+                removed += 1
+    report(compress_all(work, jobs), len(work), removed, suffixes)
+
+def compress_all(work, jobs):
+    if jobs == 1 or len(work) < 2:
+        results = list(map(compress_file, work))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(compress_file, work, chunksize=max(1, len(work) // (jobs * 4))))
+    return sum(results)
+
+def report(written, total, removed, suffixes):
+    print(f"Compressed: {written} written, {total - written} up to date, {removed} removed ({', '.join(suffixes)})")
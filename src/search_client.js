@@ -0,0 +1,75 @@
+// Client for the index written by search_index.py. index.json (documents and
+// shard names) is fetched on the first search, and after that only the shards
+// holding the query's terms. Usage: siteSearch("query").then(results => ...)
+// where results are [{url, title, score}] best first.
+(function () {
+  var base = new URL(".", document.currentScript.src).pathname;
+  var index = null;
+  var shards = {};
+
+  function fetchJson(name) {
+    return fetch(base + name).then(function (response) {
+      if (!response.ok) throw new Error(name + ": " + response.status);
+      return response.json();
+    });
+  }
+
+  function tokenize(text) {
+    return (text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []).filter(function (term) {
+      var length = Array.from(term).length;
+      return length > 1 && length <= 32;
+    });
+  }
+
+  function shardName(term, prefixLength) {
+    var prefix = Array.from(term).slice(0, prefixLength).join("");
+    if (/^[a-z0-9]+$/.test(prefix)) return prefix;
+    return "_" + Array.from(new TextEncoder().encode(prefix), function (byte) {
+      return byte.toString(16).padStart(2, "0");
+    }).join("");
+  }
+
+  function loadShard(name) {
+    if (index.shards.indexOf(name) === -1) return Promise.resolve({});
+    if (!shards[name]) shards[name] = fetchJson(name + ".json");
+    return shards[name];
+  }
+
+  function postings(term) {
+    // Postings are [doc gap, count, doc gap, count, ...].
+    return loadShard(shardName(term, index.prefix_length)).then(function (shard) {
+      var encoded = shard[term] || [];
+      var counts = new Map();
+      var doc = 0;
+      for (var i = 0; i < encoded.length; i += 2) {
+        doc += encoded[i];
+        counts.set(doc, encoded[i + 1]);
+      }
+      return counts;
+    });
+  }
+
+  window.siteSearch = function (query) {
+    var terms = tokenize(query);
+    if (!terms.length) return Promise.resolve([]);
+    var loaded = index ? Promise.resolve(index) : fetchJson("index.json").then(function (data) {
+      index = data;
+      return data;
+    });
+    return loaded.then(function () {
+      return Promise.all(terms.map(postings));
+    }).then(function (lists) {
+      // Every term has to match; the score is the sum of their counts.
+      var results = [];
+      lists[0].forEach(function (count, doc) {
+        var score = count;
+        for (var i = 1; i < lists.length; i++) {
+          if (!lists[i].has(doc)) return;
+          score += lists[i].get(doc);
+        }
+        results.push({url: index.docs[doc][0], title: index.docs[doc][1], score: score});
+      });
+      return results.sort(function (a, b) { return b.score - a.score; });
+    });
+  };
+})();
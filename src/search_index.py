@@ -0,0 +1,193 @@
+import heapq
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+
+from block_markdown import block_to_textnodes, iter_blocks
+from front_matter import read_metadata
+from page_writer import write_atomic
+
+search_dir = "search"
+index_name = "index.json"
+client_name = "search.js"
+client_source = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_client.js")
+index_version = 1
+prefix_length = 2
+max_term_length = 32
+default_run_postings = 500000
+term_pattern = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return [term for term in term_pattern.findall(text.lower()) if 1 < len(term) <= max_term_length]
+
+def page_terms(src_path):
+    # Term counts of a page's text, taken from the TextNodes each block is
+    # rendered from rather than from its HTML. The title counts on top of the
+    # heading it usually repeats, which ranks title matches first.
+    with open(src_path, 'r') as file:
+        metadata, body_start = read_metadata(file, src_path)
+        file.seek(body_start)
+        counts = Counter(tokenize(metadata["title"]))
+        for block in iter_blocks(file):
+            for node in block_to_textnodes(block):
+                counts.update(tokenize(node.text))
+    return metadata["title"], counts
+
+def shard_name(term):
+    # Shards are named after the first characters of their terms; anything
+    # but ASCII letters and digits is hex-encoded to keep file names portable.
+    prefix = term[:prefix_length]
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return "_" + prefix.encode("utf-8").hex()
+
+def encode_postings(postings):
+    # [doc gap, count, doc gap, count, ...]: gaps between ascending document
+    # ids stay small, so the JSON stays short.
+    encoded = []
+    previous = 0
+    for doc, count in postings:
+        encoded += [doc - previous, count]
+        previous = doc
+    return encoded
+
+def decode_postings(encoded):
+    postings = []
+    doc = 0
+    for position in range(0, len(encoded), 2):
+        doc += encoded[position]
+        postings.append((doc, encoded[position + 1]))
+    return postings
+
+def parse_posting(line):
+    term, doc, count = line.rstrip("\n").split("\t")
+    return term, int(doc), int(count)
+
+
+class SearchIndexBuilder:
+    # Inverts pages one at a time. Postings collect in memory until there are
+    # run_postings of them and are then written out as a sorted run; merge()
+    # streams all runs back term by term. Memory holds one run, not the index.
+    def __init__(self, tmp_dir: str, run_postings: int = default_run_postings):
+        self.tmp_dir = tmp_dir
+        self.run_postings = run_postings
+        self.docs = []
+        self.postings = []
+        self.runs = []
+
+    def add(self, url, title, counts):
+        doc = len(self.docs)
+        self.docs.append([url, title])
+        self.postings.extend((term, doc, count) for term, count in counts.items())
+        if len(self.postings) >= self.run_postings:
+            self.flush()
+
+    def flush(self):
+        if not self.postings:
+            return
+        self.postings.sort()
+        path = os.path.join(self.tmp_dir, f"run-{len(self.runs)}.tsv")
+        with open(path, 'w', encoding="utf-8") as file:
+            file.writelines(f"{term}\t{doc}\t{count}\n" for term, doc, count in self.postings)
+        self.runs.append(path)
+        self.postings = []
+
+    def merge(self):
+        # Yields (term, [(doc, count), ...]) in term order.
+        self.flush()
+        files = [open(path, 'r', encoding="utf-8") for path in self.runs]
+        try:
+            postings = heapq.merge(*(map(parse_posting, file) for file in files))
+            for term, group in groupby(postings, key=itemgetter(0)):
+                yield term, [(doc, count) for _, doc, count in group]
+        finally:
+            for file in files:
+                file.close()
+
+    def shards(self):
+        # Terms arrive sorted, so each prefix's terms are contiguous and only
+        # one shard is ever held in memory.
+        for name, terms in groupby(self.merge(), key=lambda item: shard_name(item[0])):
+            yield name, {term: encode_postings(postings) for term, postings in terms}
+
+    def __repr__(self):
+        return f"SearchIndexBuilder(docs: {len(self.docs)}, runs: {len(self.runs)})"
+
+
+def read_output(dest_path, writer=None):
+    if writer is not None:
+        entry = writer.get(dest_path)
+        return entry[0].decode("utf-8") if entry is not None else None
+    try:
+        with open(dest_path, 'r', encoding="utf-8") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+def load_index(dest_dir, writer=None):
+    text = read_output(os.path.join(dest_dir, search_dir, index_name), writer)
+    if text is None:
+        return None
+    try:
+        index = json.loads(text)
+    except ValueError:
+        return None
+    return index if index.get("version") == index_version else None
+
+def index_outputs(index):
+    names = [index_name, client_name] + [name + ".json" for name in index["shards"]]
+    return [f"{search_dir}/{name}" for name in names]
+
+def build_search_index(pages, dest_dir, source=None, run_postings=default_run_postings, writer=None, terms=page_terms):
+    # pages are (src_path, url). source identifies the inputs (the caller
+    # hashes page paths and contents); when it matches the one recorded in the
+    # existing index nothing is read. terms returns a page's title and term
+    # counts; callers pass a cached lookup. Returns the output paths relative
+    # to dest_dir and how many files were written.
+    previous = load_index(dest_dir, writer)
+    if source is not None and previous is not None and previous.get("source") == source:
+        return index_outputs(previous), 0
+
+    def write(name, text):
+        dest_path = os.path.join(dest_dir, search_dir, name)
+        if writer is not None:
+            writer.submit(dest_path, text)
+            return True
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        return write_atomic(dest_path, text)
+
+    written = 0
+    shards = []
+    with tempfile.TemporaryDirectory(prefix="search-") as tmp_dir:
+        builder = SearchIndexBuilder(tmp_dir, run_postings)
+        for src_path, url in pages:
+            title, counts = terms(src_path)
+            builder.add(url, title, counts)
+        for name, shard in builder.shards():
+            shards.append(name)
+            written += write(name + ".json", json.dumps(shard, ensure_ascii=False, separators=(",", ":")))
+
+    index = {
+        "version": index_version,
+        "source": source,
+        "prefix_length": prefix_length,
+        "docs": builder.docs,
+        "shards": shards,
+    }
+    written += write(index_name, json.dumps(index, ensure_ascii=False, separators=(",", ":")))
+    with open(client_source, 'r') as file:
+        written += write(client_name, file.read())
+
+    if previous is not None:
+        for name in sorted(set(previous["shards"]) - set(shards)):
+            dest_path = os.path.join(dest_dir, search_dir, name + ".json")
+            if writer is not None:
+                writer.remove(dest_path)
+            elif os.path.exists(dest_path):
+                os.remove(dest_path)
+    return index_outputs(index), written
@@ -0,0 +1,214 @@
+import mimetypes
+import os
+import posixpath
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from build_manifest import BuildManifest
+from main import (
+    apply_render_options, build_parser, check_site_links, generate_pages_recursive, sync_assets, update_search_index,
+    update_site_index, watch_site,
+)
+from page_writer import MemoryWriter
+from parse_cache import ParseCache
+
+live_reload_path = "/__livereload"
+live_reload_script = (
+    f'<script>new EventSource("{live_reload_path}").onmessage = function () {{ location.reload(); }};</script>'
+).encode()
+keepalive_interval = 15
+
+
+class ReloadNotifier:
+    # Counts finished rebuilds; each live-reload stream waits for the count to
+    # move past the one it last saw.
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class PreviewSite:
+    # Resolves request paths to pages rendered into memory, falling back to
+    # the asset outputs the writer lists. Other files in public/ (pages of an
+    # earlier build, say) are never served.
+    def __init__(self, public_dir: str, writer: MemoryWriter):
+        self.public_dir = public_dir
+        self.writer = writer
+        self.files = {}
+        self.files_lock = threading.Lock()
+
+    def dest_path(self, url_path):
+        parts = [part for part in unquote(url_path).split("/") if part not in ("", ".", "..")]
+        path = os.path.join(self.public_dir, *parts)
+        if url_path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        return path
+
+    def read_file(self, path):
+        # Files on disk are cached by mtime and size so repeated requests don't
+        # read them again.
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not os.path.isfile(path):
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self.files.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(path, 'rb') as file:
+            data = file.read()
+        entry = (data, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"')
+        with self.files_lock:
+            self.files[path] = (stamp, entry)
+        return entry
+
+    def lookup(self, url_path):
+        path = self.dest_path(url_path)
+        entry = self.writer.get(path)
+        if entry is None and os.path.relpath(path, self.public_dir) in self.writer.files:
+            entry = self.read_file(path)
+        return path, entry
+
+    def is_directory(self, url_path):
+        return self.lookup(url_path.rstrip("/") + "/")[1] is not None
+
+
+def make_handler(site, notifier):
+    class PreviewHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.respond(head=False)
+
+        def do_HEAD(self):
+            self.respond(head=True)
+
+        def respond(self, head):
+            url_path = urlsplit(self.path).path
+            if url_path == live_reload_path:
+                return self.stream_reloads()
+            if not url_path.endswith("/") and "." not in posixpath.basename(url_path) and site.is_directory(url_path):
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", url_path + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            path, entry = site.lookup(url_path)
+            if entry is None:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            data, etag = entry
+            if etag in self.headers.get("If-None-Match", ""):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if content_type == "text/html":
+                data = inject_live_reload(data)
+                content_type += "; charset=utf-8"
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if not head:
+                self.wfile.write(data)
+
+        def stream_reloads(self):
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            version = notifier.version
+            try:
+                while True:
+                    latest = notifier.wait(version, keepalive_interval)
+                    if latest != version:
+                        version = latest
+                        self.wfile.write(b"data: reload\n\n")
+                    else:
+                        # Comments keep proxies from timing out and reveal
+                        # clients that went away.
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+        def log_message(self, format, *args):
+            pass
+
+    return PreviewHandler
+
+def inject_live_reload(data):
+    index = data.rfind(b"</body>")
+    if index == -1:
+        return data + live_reload_script
+    return data[:index] + live_reload_script + data[index:]
+
+def parse_args(argv=None):
+    parser = build_parser("Build the site into memory, serve it and reload browsers when it is rebuilt")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8888, help="port to listen on")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    cache = ParseCache.load(args.parse_cache_path, args.parse_cache_size * 2**20) if args.parse_cache else None
+
+    source_dir = 'static'
+    public_dir = 'public'
+    markdown_path = 'content'
+    template_path = 'template.html'
+
+    apply_render_options(args)
+
+    # Assets still go through public/ so fingerprinting and image variants
+    # work as in a normal build; pages only ever live in memory. The manifest
+    # is kept in memory too, just for its dependency graph.
+    manifest = BuildManifest()
+    writer = MemoryWriter()
+    manifest.assets, asset_outputs = sync_assets(source_dir, public_dir, (), args, jobs)
+    writer.files = set(asset_outputs)
+    pages = generate_pages_recursive(markdown_path, template_path, public_dir, manifest, jobs, None, cache, source_dir, writer=writer)
+    if args.site_index:
+        update_site_index(pages, template_path, public_dir, manifest, args, writer)
+    if args.search_index:
+        update_search_index(pages, public_dir, manifest, writer)
+    if args.check_links:
+        check_site_links(pages, public_dir, writer, manifest)
+
+    notifier = ReloadNotifier()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(PreviewSite(public_dir, writer), notifier))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving {len(writer.pages)} pages at http://{args.host}:{server.server_address[1]}/")
+    try:
+        watch_site(markdown_path, source_dir, template_path, public_dir, manifest, args, jobs, cache, writer, notifier.notify)
+    finally:
+        server.shutdown()
+        if cache is not None:
+            cache.save(args.parse_cache_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import re
+from functools import partial
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape, quoteattr
+
+from front_matter import scan_metadata
+from leafnode import LeafNode
+from page_writer import write_atomic
+from parentnode import ParentNode
+
+listing_dir = "archive"
+tags_dir = "tags"
+sitemap_name = "sitemap.xml"
+feed_name = "atom.xml"
+default_per_page = 10
+default_feed_size = 20
+slug_pattern = re.compile(r"[^a-z0-9]+")
+
+
+def tag_slug(tag):
+    return slug_pattern.sub("-", tag.lower()).strip("-") or "tag"
+
+def tag_slugs(tags):
+    # Maps each tag to its slug. Tags whose slugs collide ("C++" and "C#" are
+    # both "c") get a suffix hashed from the tag, except the first of them in
+    # sorted order, so each keeps its own page.
+    slugs = {}
+    taken = set()
+    for tag in sorted(tags):
+        slug = tag_slug(tag)
+        if slug in taken:
+            slug += "-" + hashlib.blake2b(tag.encode(), digest_size=3).hexdigest()
+        taken.add(slug)
+        slugs[tag] = slug
+    return slugs
+
+def listing_url(number):
+    return f"/{listing_dir}/" if number == 1 else f"/{listing_dir}/{number}/"
+
+def tag_url(slug):
+    return f"/{tags_dir}/{slug}/"
+
+def output_path(url):
+    # Output path relative to public/ of an index URL, with "/" as separator.
+    path = url.lstrip("/")
+    return path + "index.html" if not path or path.endswith("/") else path
+
+def atom_date(day):
+    return day + "T00:00:00Z" if len(day) == 10 else day
+
+
+class SiteIndex:
+    # URL, title, date and tags of every published page, keyed by source path.
+    # Entries remember the source hash they were scanned from, and outputs the
+    # key of the entries they were rendered from, so an incremental build only
+    # re-reads changed pages and rewrites the listings that show them.
+    def __init__(self, entries: dict = None, outputs: dict = None):
+        self.entries = entries if entries is not None else {}
+        self.outputs = outputs if outputs is not None else {}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(dict(data.get("entries", {})), dict(data.get("outputs", {})))
+
+    def to_json(self):
+        return {"entries": self.entries, "outputs": self.outputs}
+
+    def update(self, pages):
+        # pages are (src_path, url, src_hash); a hash of None always rescans.
+        entries = {}
+        scanned = 0
+        for src_path, url, src_hash in pages:
+            entry = self.entries.get(src_path)
+            if entry is None or src_hash is None or entry["hash"] != src_hash or entry["url"] != url:
+                metadata = scan_metadata(src_path)
+                entry = {
+                    "hash": src_hash,
+                    "url": url,
+                    "title": metadata["title"] or url,
+                    "date": metadata["date"],
+                    "tags": metadata["tags"],
+                }
+                scanned += 1
+            entries[src_path] = entry
+        self.entries = entries
+        return scanned
+
+    def sorted_entries(self):
+        # Newest first; the site root is not a post, so listings leave it out.
+        return sorted(self.entries.values(), key=lambda entry: (entry["date"], entry["url"]), reverse=True)
+
+    def listed_entries(self):
+        return [entry for entry in self.sorted_entries() if entry["url"] != "/"]
+
+    def __repr__(self):
+        return f"SiteIndex(pages: {len(self.entries)}, outputs: {len(self.outputs)})"
+
+
+def listing_node(heading, entries, newer=None, older=None):
+    items = [
+        ParentNode("li", [
+            LeafNode("a", entry["title"], {"href": entry["url"]}),
+            LeafNode(None, " "),
+            LeafNode("time", entry["date"], {"datetime": entry["date"]}),
+        ])
+        for entry in entries
+    ]
+    children = [LeafNode("h1", heading), ParentNode("ul", items)]
+    links = []
+    if newer is not None:
+        links.append(LeafNode("a", "Newer", {"href": newer, "rel": "prev"}))
+    if older is not None:
+        links.append(LeafNode("a", "Older", {"href": older, "rel": "next"}))
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children)
+
+def tags_node(tags):
+    items = [
+        ParentNode("li", [LeafNode("a", tag, {"href": tag_url(slug)}), LeafNode(None, f" ({count})")])
+        for tag, slug, count in tags
+    ]
+    return ParentNode("div", [LeafNode("h1", "Tags"), ParentNode("ul", items)])
+
+def render_sitemap(site_url, entries):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for entry in sorted(entries, key=lambda entry: entry["url"]):
+        lines.append(f"<url><loc>{escape(site_url + entry['url'])}</loc><lastmod>{escape(entry['date'])}</lastmod></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+def render_feed(site_url, entries, author=None):
+    # Atom requires an author; the site's host stands in when none is given.
+    title = urlsplit(site_url).netloc or site_url
+    updated = atom_date(max((entry["date"] for entry in entries), default="1970-01-01"))
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{escape(title)}</title>",
+        f"<id>{escape(site_url)}/</id>",
+        f"<link href={quoteattr(site_url + '/' + feed_name)} rel=\"self\"/>",
+        f"<link href={quoteattr(site_url + '/')}/>",
+        f"<updated>{updated}</updated>",
+        f"<author><name>{escape(author or title)}</name></author>",
+    ]
+    for entry in entries:
+        url = site_url + entry["url"]
+        lines.append("<entry>")
+        lines.append(f"<title>{escape(entry['title'])}</title>")
+        lines.append(f"<link href={quoteattr(url)}/>")
+        lines.append(f"<id>{escape(url)}</id>")
+        lines.append(f"<updated>{escape(atom_date(entry['date']))}</updated>")
+        for tag in entry["tags"]:
+            lines.append(f"<category term={quoteattr(tag)}/>")
+        lines.append("</entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+def plan_outputs(index, template, site_url, per_page=default_per_page, feed_size=default_feed_size, author=None):
+    # Maps each output path to the data it shows and a function rendering it.
+    # The data is what the output's key is computed from, so only outputs
+    # whose slice of the index changed are rendered again.
+    def page(title, content, url, newest, tags=""):
+        return lambda: template.render({"Title": title, "Content": content(), "Path": url, "Date": newest, "Tags": tags})
+
+    def shown(entries):
+        return [[entry["url"], entry["title"], entry["date"]] for entry in entries]
+
+    listed = index.listed_entries()
+    outputs = {}
+    count = -(-len(listed) // per_page)
+    for number in range(1, count + 1):
+        entries = listed[(number - 1) * per_page:number * per_page]
+        newer = listing_url(number - 1) if number > 1 else None
+        older = listing_url(number + 1) if number < count else None
+        url = listing_url(number)
+        outputs[output_path(url)] = (
+            ["listing", number, count, shown(entries)],
+            page("Archive", partial(listing_node, "Archive", entries, newer, older), url, entries[0]["date"]),
+        )
+
+    # Tags differing only in case are one tag, shown as first spelled.
+    tagged = {}
+    for entry in listed:
+        for key, tag in {tag.lower(): tag for tag in reversed(entry["tags"])}.items():
+            tagged.setdefault(key, (tag, []))[1].append(entry)
+    slugs = tag_slugs(tagged)
+    by_slug = sorted((slugs[key], tag, entries) for key, (tag, entries) in tagged.items())
+    for slug, tag, entries in by_slug:
+        url = tag_url(slug)
+        outputs[output_path(url)] = (
+            ["tag", tag, shown(entries)],
+            page(tag, partial(listing_node, tag, entries), url, entries[0]["date"], tag),
+        )
+    if tagged:
+        tags = [(tag, slug, len(entries)) for slug, tag, entries in by_slug]
+        url = f"/{tags_dir}/"
+        outputs[output_path(url)] = (["tags", tags], page("Tags", partial(tags_node, tags), url, listed[0]["date"]))
+
+    entries = index.sorted_entries()
+    if entries:
+        outputs[sitemap_name] = (
+            ["sitemap", site_url, sorted([entry["url"], entry["date"]] for entry in entries)],
+            partial(render_sitemap, site_url, entries),
+        )
+    if listed:
+        recent = listed[:feed_size]
+        outputs[feed_name] = (
+            ["feed", site_url, author, [[entry["url"], entry["title"], entry["date"], entry["tags"]] for entry in recent]],
+            partial(render_feed, site_url, recent, author),
+        )
+    return outputs
+
+def output_key(context, data):
+    return hashlib.sha256(json.dumps([context, data], sort_keys=True).encode()).hexdigest()
+
+def write_site_index(index, dest_dir, template, context, site_url, per_page=default_per_page, feed_size=default_feed_size, writer=None, author=None):
+    # context stands for everything besides the index that shapes the outputs
+    # (template contents, build options); changing it rewrites all of them.
+    # Returns the output paths with how many were written and left alone.
+    outputs = plan_outputs(index, template, site_url.rstrip("/"), per_page, feed_size, author)
+    keys = {}
+    written = unchanged = 0
+    for rel_path, (data, render) in outputs.items():
+        dest_path = os.path.join(dest_dir, *rel_path.split("/"))
+        key = keys[rel_path] = output_key(context, data)
+        exists = writer.get(dest_path) is not None if writer is not None else os.path.exists(dest_path)
+        if index.outputs.get(rel_path) == key and exists:
+            unchanged += 1
+            continue
+        if writer is not None:
+            writer.submit(dest_path, render())
+            written += 1
+        else:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            if write_atomic(dest_path, render()):
+                written += 1
+            else:
+                unchanged += 1
+
+    for rel_path in sorted(set(index.outputs) - set(keys)):
+        dest_path = os.path.join(dest_dir, *rel_path.split("/"))
+        if writer is not None:
+            writer.remove(dest_path)
+        elif os.path.exists(dest_path):
+            os.remove(dest_path)
+            try:
+                os.rmdir(os.path.dirname(dest_path))
+            except OSError:
+                pass
+        print(f"Removed stale index output: {dest_path}")
+    index.outputs = keys
+    return list(keys), written, unchanged
@@ -0,0 +1,114 @@
+import io
+import os
+import re
+
+import asset_urls
+import minify
+from htmlnode import HTMLNode
+
+placeholder_pattern = re.compile(r"\{\{\s*([\w-]+)\s*\}\}")
+include_pattern = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+
+
+class Template:
+    def __init__(self, segments: list, slots: list, dependencies: list = None):
+        if len(segments) != len(slots) + 1:
+            raise ValueError("Template must have one more segment than slots")
+        self.segments = segments
+        self.slots = slots
+        self.dependencies = dependencies if dependencies is not None else []
+
+    @classmethod
+    def parse(cls, text, base_dir=None):
+        dependencies = []
+        if base_dir is not None:
+            text = expand_includes(text, base_dir, dependencies)
+        # URLs are rewritten while their attributes still have the quotes
+        # the pattern needs; minifying may drop them.
+        text = asset_urls.rewrite_html_urls(text)
+        if minify.enabled:
+            text = minify.minify_markup(text)
+        segments = []
+        slots = []
+        position = 0
+        for match in placeholder_pattern.finditer(text):
+            segments.append(text[position:match.start()])
+            slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        segments.append(text[position:])
+        return cls(segments, slots, dependencies)
+
+    def placeholders(self):
+        return [name for name, _ in self.slots]
+
+    def render_to(self, fp, values):
+        write = fp.write
+        write(self.segments[0])
+        for (name, raw), segment in zip(self.slots, self.segments[1:]):
+            value = values.get(name)
+            if value is None:
+                write(raw)
+            elif isinstance(value, HTMLNode):
+                value.write_html(fp)
+            elif callable(value):
+                value(fp)
+            else:
+                write(str(value))
+            write(segment)
+
+    def render(self, values):
+        buffer = io.StringIO()
+        self.render_to(buffer, values)
+        return buffer.getvalue()
+
+    def __repr__(self):
+        return f"Template(slots: {self.placeholders()})"
+
+
+def expand_includes(text, base_dir, dependencies, including=()):
+    def include(match):
+        path = os.path.join(base_dir, match.group(1))
+        if path in including:
+            raise ValueError(f"Template include cycle: {' -> '.join(including + (path,))}")
+        with open(path, 'r') as file:
+            partial = file.read()
+        dependencies.append(path)
+        return expand_includes(partial, os.path.dirname(path), dependencies, including + (path,))
+
+    return include_pattern.sub(include, text)
+
+
+template_cache = {}
+
+def file_stamps(paths):
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamps.append((stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+def load_template(path):
+    cached = template_cache.get(path)
+    if (
+        cached is not None
+        and cached[1] == (asset_urls.asset_urls_digest, minify.enabled)
+        and file_stamps([path] + cached[2].dependencies) == cached[0]
+    ):
+        return cached[2]
+    with open(path, 'r') as file:
+        template = Template.parse(file.read(), os.path.dirname(path))
+    template_cache[path] = (file_stamps([path] + template.dependencies), (asset_urls.asset_urls_digest, minify.enabled), template)
+    return template
+
+def template_dependencies(path):
+    return [path] + load_template(path).dependencies
+
+def template_urls(path):
+    urls = []
+    for dependency in template_dependencies(path):
+        with open(dependency, 'r') as file:
+            urls.extend(asset_urls.html_urls(file.read()))
+    return urls
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+import assets
+from assets import file_unchanged, list_files, place_file, remove_unlisted, sync_directory
+
+class TestSyncDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.src, "images"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, root, rel_path, content):
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_list_files_is_relative_and_sorted(self):
+        self.write(self.src, "index.css", "body {}")
+        self.write(self.src, "images/b.png", "b")
+        self.write(self.src, "images/a.png", "a")
+        self.assertEqual(
+            list_files(self.src),
+            ["index.css", os.path.join("images", "a.png"), os.path.join("images", "b.png")],
+        )
+
+    def test_copies_new_files_and_skips_unchanged(self):
+        self.write(self.src, "index.css", "body {}")
+        synced = sync_directory(self.src, self.dst, link="copy")
+        self.assertEqual(synced, ["index.css"])
+        dst_path = os.path.join(self.dst, "index.css")
+        self.assertTrue(file_unchanged(os.path.join(self.src, "index.css"), dst_path))
+
+    def test_changed_size_is_recopied(self):
+        src_path = self.write(self.src, "index.css", "body {}")
+        sync_directory(self.src, self.dst, link="copy")
+        self.write(self.src, "index.css", "body { color: red; }")
+        self.assertFalse(file_unchanged(src_path, os.path.join(self.dst, "index.css")))
+        sync_directory(self.src, self.dst, link="copy")
+        with open(os.path.join(self.dst, "index.css")) as file:
+            self.assertEqual(file.read(), "body { color: red; }")
+
+    def test_checksum_matches_content_with_different_mtime(self):
+        src_path = self.write(self.src, "index.css", "body {}")
+        dst_path = self.write(self.dst, "index.css", "body {}")
+        os.utime(dst_path, (0, 0))
+        self.assertFalse(file_unchanged(src_path, dst_path))
+        self.assertTrue(file_unchanged(src_path, dst_path, checksum=True))
+
+    def test_removes_only_previously_synced_files(self):
+        self.write(self.src, "images/old.png", "old")
+        previous = sync_directory(self.src, self.dst, link="copy")
+        page = self.write(self.dst, "index.html", "<p>page</p>")
+        os.remove(os.path.join(self.src, "images", "old.png"))
+        self.assertEqual(sync_directory(self.src, self.dst, previous, link="copy"), [])
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_remove_unlisted_keeps_only_build_outputs(self):
+        kept = self.write(self.dst, "blog/post.html", "post")
+        stale = self.write(self.dst, "drafts/old.html", "old")
+        self.assertEqual(remove_unlisted(self.dst, [os.path.join("blog", "post.html")]), [stale])
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "drafts")))
+
+    def test_hardlink_mode_links_to_source(self):
+        src_path = self.write(self.src, "index.css", "body {}")
+        sync_directory(self.src, self.dst, link="hardlink")
+        self.assertTrue(os.path.samefile(src_path, os.path.join(self.dst, "index.css")))
+
+    def test_place_file_does_not_write_through_links(self):
+        victim = self.write(self.src, "victim.css", "victim")
+        src_path = self.write(self.src, "index.css", "body {}")
+        dst_path = os.path.join(self.tmp.name, "index.css")
+        os.link(victim, dst_path)
+        place_file(src_path, dst_path, "copy")
+        with open(victim) as file:
+            self.assertEqual(file.read(), "victim")
+        with open(dst_path) as file:
+            self.assertEqual(file.read(), "body {}")
+
+    def test_auto_mode_remembers_devices_without_reflinks(self):
+        src_path = self.write(self.src, "index.css", "body {}")
+        os.makedirs(self.dst)
+        place_file(src_path, os.path.join(self.dst, "a.css"), "auto")
+        device = os.stat(self.dst).st_dev
+        try:
+            assets.reflink(src_path, os.path.join(self.dst, "probe.css"))
+        except OSError:
+            self.assertIn(device, assets.reflink_unsupported)
+        assets.reflink_unsupported.add(device)
+        try:
+            place_file(src_path, os.path.join(self.dst, "b.css"), "auto")
+        finally:
+            assets.reflink_unsupported.discard(device)
+        with open(os.path.join(self.dst, "b.css")) as file:
+            self.assertEqual(file.read(), "body {}")
+
+if __name__ == "__main__":
+    unittest.main()
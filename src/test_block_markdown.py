@@ -1,6 +1,11 @@
+import io
 import unittest
 
+import minify
 from block_markdown import *
+from build_profile import PageStats
+from parse_cache import ParseCache
+from textnode import TextNode, text_type_bold, text_type_link, text_type_text
 
 class TestMarkdownToBlocks(unittest.TestCase):
 
@@ -59,6 +64,20 @@ This is a paragraph of text.
         result = markdown_to_blocks(markdown)
         self.assertEqual(result, expected)
 
+    def test_iter_blocks_is_lazy(self):
+        def lines():
+            yield "# Heading\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(iter_blocks(lines())), "# Heading")
+
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        markdown = "\n\n  # Heading  \n\n\n\npara line 1\npara line 2\n  \n\n* item\n"
+        self.assertEqual(
+            list(iter_blocks(io.StringIO(markdown))),
+            ["# Heading", "para line 1\npara line 2", "* item"],
+        )
+
 class TestMarkdownBlockTypes(unittest.TestCase):
 
     def test_heading(self):
@@ -115,6 +134,22 @@ class TestMarkdownBlockTypes(unittest.TestCase):
         block = "This is a paragraph with multiple lines.\nIt should still be considered a paragraph."
         self.assertEqual(block_to_block_type(block), 'paragraph')
 
+    def test_long_ordered_list(self):
+        block = "\n".join(f"{i}. item {i}" for i in range(1, 13))
+        self.assertEqual(block_to_block_type(block), 'ordered_list')
+        html = markdown_to_html_node(block).to_html()
+        self.assertIn("<li>item 12</li></ol>", html)
+
+    def test_misnumbered_ordered_list(self):
+        self.assertEqual(block_to_block_type("1. one\n3. three"), 'paragraph')
+
+    def test_mixed_list_markers_are_paragraph(self):
+        self.assertEqual(block_to_block_type("> quote\n* item"), 'paragraph')
+
+    def test_classify_block_returns_lines(self):
+        self.assertEqual(classify_block("* a\n- b"), ('unordered_list', ["* a", "- b"]))
+        self.assertEqual(classify_block("## Title"), ('heading', None))
+
 class TestMarkdownToHTML(unittest.TestCase):
     def test_markdown_to_blocks(self):
         md = """
@@ -237,8 +272,16 @@ this is paragraph text
         html = node.to_html()
         self.assertEqual(
             html,
-            "<div><h1>this is an h1</h1><p>this is paragraph text</p><h2>this is an h2</h2></div>",
+            '<div><h1 id="this-is-an-h1">this is an h1</h1><p>this is paragraph text</p><h2 id="this-is-an-h2">this is an h2</h2></div>',
+        )
+
+    def test_heading_ids_come_from_the_heading_text(self):
+        self.assertEqual(
+            heading_to_html_node("## Using `C++` and **Rust**, too!").to_html(),
+            '<h2 id="using-c-and-rust-too">Using <code>C++</code> and <b>Rust</b>, too!</h2>',
         )
+        self.assertEqual(heading_to_html_node("# Größe").props, {"id": "größe"})
+        self.assertIsNone(heading_to_html_node("# !!").props)
 
     def test_blockquote(self):
         md = """
@@ -272,5 +315,39 @@ this is paragraph text
             "<div><blockquote>This is a blockquote block</blockquote><p>this is paragraph text</p></div>",
         )
 
+    def test_write_markdown_html_matches_tree(self):
+        md = "# Title\n\nSome **bold** text\n\n> quoted\n\n1. one\n2. two\n"
+        buffer = io.StringIO()
+        write_markdown_html(io.StringIO(md), buffer)
+        self.assertEqual(buffer.getvalue(), markdown_to_html_node(md).to_html())
+
+    def test_repeated_headings_get_unique_ids(self):
+        md = "## Notes\n\none\n\n## Notes\n\n# Notes 1\n\n## Notes\n"
+        expected = ('<div><h2 id="notes">Notes</h2><p>one</p><h2 id="notes-1">Notes</h2>'
+                    '<h1 id="notes-1-1">Notes 1</h1><h2 id="notes-2">Notes</h2></div>')
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        cache = ParseCache()
+        for options in ({}, {"cache": cache}, {"cache": cache}, {"stats": PageStats("page.md"), "cache": cache}):
+            buffer = io.StringIO()
+            write_markdown_html(io.StringIO(md), buffer, **options)
+            self.assertEqual(buffer.getvalue(), expected)
+
+    def test_minified_repeated_headings_get_unique_ids(self):
+        minify.set_minify(True)
+        try:
+            cache = ParseCache()
+            for _ in range(2):
+                buffer = io.StringIO()
+                write_markdown_html(io.StringIO("# Größe\n\n# Größe\n"), buffer, cache=cache)
+                self.assertEqual(buffer.getvalue(), "<div><h1 id=größe>Größe</h1><h1 id=größe-1>Größe</h1></div>")
+        finally:
+            minify.set_minify(False)
+
+    def test_block_to_textnodes_strips_block_syntax(self):
+        self.assertEqual(block_to_textnodes("## A **b**"), [TextNode("A ", text_type_text), TextNode("b", text_type_bold)])
+        self.assertEqual(block_to_textnodes("1. one\n2. [two](/t)"), [TextNode("one", text_type_text), TextNode("two", text_type_link, "/t")])
+        self.assertEqual(block_to_textnodes("> a\n> b"), [TextNode("a b", text_type_text)])
+        self.assertEqual(block_to_textnodes("```\ncode\n```"), [TextNode("code\n", text_type_text)])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
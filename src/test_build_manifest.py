@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from build_manifest import BuildManifest, SourceCache, hash_file, linked_static_files, scan_markdown
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_hash_file_changes_with_content(self):
+        path = self.write("page.md", "# One")
+        first = hash_file(path)
+        self.write("page.md", "# Two")
+        self.assertNotEqual(first, hash_file(path))
+
+    def test_changes_lists_every_reason(self):
+        dest = self.write("page.html", "<p>x</p>")
+        manifest = BuildManifest()
+        inputs = {"page.md": "abc", "template.html": "tpl"}
+        self.assertEqual(manifest.changes("page.md", inputs, dest), ["new page"])
+        manifest.record("page.md", dest, inputs, ["new page"])
+        self.assertEqual(manifest.changes("page.md", inputs, dest), [])
+        self.assertEqual(
+            manifest.changes("page.md", {"page.md": "abd", "static/a.png": "img"}, dest),
+            ["page.md changed", "static/a.png added as a dependency", "template.html no longer a dependency"],
+        )
+        os.remove(dest)
+        self.assertEqual(manifest.changes("page.md", inputs, dest), [f"output {dest} missing"])
+
+    def test_dependents_and_find(self):
+        manifest = BuildManifest()
+        manifest.record("a.md", "a.html", {"a.md": "1", "template.html": "t"}, [])
+        manifest.record("b.md", "b.html", {"b.md": "2", "template.html": "t", "static/x.png": "x"}, [])
+        self.assertEqual(manifest.dependents("template.html"), {"a.md", "b.md"})
+        self.assertEqual(manifest.dependents("static/x.png"), {"b.md"})
+        self.assertEqual(manifest.find("b.html"), "b.md")
+        self.assertEqual(manifest.find("a.md"), "a.md")
+        self.assertIsNone(manifest.find("c.md"))
+
+    def test_scan_markdown_and_linked_static_files(self):
+        static = os.path.join(self.dir, "static")
+        os.makedirs(os.path.join(static, "images"))
+        image = os.path.join(static, "images", "a.png")
+        self.write(os.path.join("static", "images", "a.png"), "png")
+        page = self.write("page.md", "![a](/images/a.png) [b](../images/a.png) [c](https://x.org/a.png) [d](/missing)")
+        digest, urls = scan_markdown(page)
+        self.assertEqual(digest, hash_file(page))
+        self.assertEqual(urls, ["/images/a.png", "../images/a.png", "https://x.org/a.png", "/missing"])
+        self.assertEqual(linked_static_files(urls, "/blog/post.html", static), [image])
+        self.assertEqual(
+            linked_static_files(["/images/a.png", "/new.css", "/page.html", "/dir/"], "/", static, include_missing=True),
+            [image, os.path.join(static, "new.css")],
+        )
+        page = self.write("long.md", "# Tïtle\n\n" + "words " * 10000 + "\n\n[é](/é.png)\n[x](/x.css) [y](/y)\n")
+        self.assertEqual(scan_markdown(page), (hash_file(page), ["/é.png", "/x.css", "/y"]))
+
+    def test_save_and_load_roundtrip(self):
+        path = os.path.join(self.dir, "manifest.json")
+        manifest = BuildManifest()
+        manifest.record("page.md", "page.html", {"page.md": "abc"}, ["new page"])
+        manifest.save(path)
+        loaded = BuildManifest.load(path)
+        self.assertEqual(loaded.pages, manifest.pages)
+
+    def test_load_corrupt_manifest_starts_empty(self):
+        path = self.write("manifest.json", "{not json")
+        self.assertEqual(BuildManifest.load(path).pages, {})
+
+    def test_prune_removes_outputs_of_deleted_sources(self):
+        kept = self.write("kept.html", "kept")
+        stale = self.write("stale.html", "stale")
+        manifest = BuildManifest({
+            "kept.md": {"dest": kept, "inputs": {"kept.md": "a"}, "reasons": []},
+            "stale.md": {"dest": stale, "inputs": {"stale.md": "b"}, "reasons": []},
+        })
+        manifest.keep("kept.md")
+        self.assertEqual(manifest.prune(), [stale])
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(stale))
+        self.assertEqual(list(manifest.pages), ["kept.md"])
+
+    def test_source_cache_rereads_only_changed_sources(self):
+        manifest = BuildManifest()
+        cache = manifest.source_cache("words")
+        self.assertEqual(cache.get("a.md", "h1", str.upper), "A.MD")
+        self.assertEqual(cache.get("a.md", "h1", len), "A.MD")
+        self.assertEqual(cache.get("a.md", "h2", len), 4)
+        self.assertEqual(cache.get("b.md", None, len), 4)
+        self.assertEqual(cache.read, 3)
+        cache.prune(["a.md"])
+        self.assertEqual(manifest.sources, {"words": {"a.md": ["h2", 4]}})
+
+        path = os.path.join(self.dir, "manifest.json")
+        manifest.save(path)
+        self.assertEqual(BuildManifest.load(path).source_cache("words").get("a.md", "h2", str), 4)
+        self.assertEqual(repr(SourceCache()), "SourceCache(pages: 0, read: 0)")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+
+from block_markdown import block_to_html_node
+from build_profile import BuildProfile, PageStats
+
+class TestBuildProfile(unittest.TestCase):
+
+    def test_record_block_counts_blocks_and_inline_nodes(self):
+        stats = PageStats("page.md")
+        stats.record_block(block_to_html_node("Some **bold** and *italic* with [a link](/x)"))
+        stats.record_block(block_to_html_node("## Heading"))
+        self.assertEqual(stats.blocks, {"paragraph": 1, "heading": 1})
+        self.assertEqual(stats.inline, {"text": 4, "bold": 1, "italic": 1, "link": 1})
+
+    def test_end_assigns_remaining_time_to_template(self):
+        stats = PageStats("page.md", clock=iter([10.0, 12.5]).__next__)
+        stats.begin()
+        stats.stages["read"] = 0.5
+        stats.stages["parse"] = 1.0
+        stats.stages["template"] = 99.0
+        stats.end()
+        self.assertEqual(stats.total, 2.5)
+        self.assertEqual(stats.stages["template"], 1.0)
+
+    def test_end_never_assigns_negative_template_time(self):
+        stats = PageStats("page.md", clock=iter([0.0, 1.0]).__next__)
+        stats.begin()
+        stats.stages["parse"] = 1.5
+        stats.end()
+        self.assertEqual(stats.stages["template"], 0.0)
+
+    def test_totals_and_trace(self):
+        profile = BuildProfile()
+        for path in ("a.md", "b.md"):
+            stats = PageStats(path)
+            stats.begin()
+            stats.stages["parse"] = 0.5
+            stats.blocks["paragraph"] = 2
+            stats.end()
+            profile.add(stats)
+        totals, blocks, _ = profile.totals()
+        self.assertEqual(totals["parse"], 1.0)
+        self.assertEqual(blocks["paragraph"], 4)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            profile.write_trace(path)
+            with open(path) as file:
+                events = json.load(file)["traceEvents"]
+        self.assertEqual([event["name"] for event in events], ["a.md", "b.md"])
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["args"]["parse_ms"], 500.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import unittest
+
+from asset_urls import rewrite_html_urls, rewrite_url, set_asset_urls
+from fingerprint import AssetHashes, fingerprint_assets, fingerprinted_name
+from parse_cache import block_key
+import minify
+from template import load_template
+from textnode import TextNode, text_node_to_html_node, text_type_image, text_type_link
+
+class TestFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.src, "images"))
+
+    def tearDown(self):
+        set_asset_urls({})
+        self.tmp.cleanup()
+
+    def write(self, rel_path, content):
+        path = os.path.join(self.src, rel_path)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("index.css", "3f9a1c7b00"), "index.3f9a1c7b.css")
+        self.assertEqual(fingerprinted_name(os.path.join("images", "a.b.png"), "abcdef0123"), os.path.join("images", "a.b.abcdef01.png"))
+
+    def test_hashes_are_reused_while_size_and_mtime_match(self):
+        path = self.write("index.css", "body {}")
+        hashes = AssetHashes()
+        first = hashes.get(path)
+        self.assertEqual(hashes.get(path), first)
+        self.assertEqual(hashes.hashed, 1)
+        self.write("index.css", "body { margin: 0 }")
+        self.assertNotEqual(hashes.get(path), first)
+        self.assertEqual(hashes.hashed, 2)
+
+    def test_fingerprint_assets_writes_copies_and_manifest(self):
+        self.write("index.css", "body {}")
+        self.write(os.path.join("images", "a.png"), "png")
+        files = ["index.css", os.path.join("images", "a.png")]
+        urls, outputs = fingerprint_assets(self.src, self.dst, files, AssetHashes(), link="copy")
+        css = urls["/index.css"]
+        self.assertRegex(css, r"^/index\.[0-9a-f]{8}\.css$")
+        self.assertTrue(os.path.exists(os.path.join(self.dst, css[1:])))
+        self.assertIn("asset-manifest.json", outputs)
+        with open(os.path.join(self.dst, "asset-manifest.json")) as file:
+            self.assertEqual(json.load(file), urls)
+
+        self.write("index.css", "body { margin: 0 }")
+        new_urls, _ = fingerprint_assets(self.src, self.dst, files, AssetHashes(), link="copy")
+        self.assertNotEqual(new_urls["/index.css"], css)
+        self.assertFalse(os.path.exists(os.path.join(self.dst, css[1:])))
+        self.assertEqual(new_urls["/images/a.png"], urls["/images/a.png"])
+
+    def test_rewrite_url_keeps_query_and_fragment(self):
+        set_asset_urls({"/index.css": "/index.1234.css"})
+        self.assertEqual(rewrite_url("/index.css"), "/index.1234.css")
+        self.assertEqual(rewrite_url("/index.css?v=1#top"), "/index.1234.css?v=1#top")
+        self.assertEqual(rewrite_url("index.css"), "index.css")
+        self.assertEqual(rewrite_url("/other.css"), "/other.css")
+        self.assertEqual(rewrite_html_urls('<link href="/index.css">'), '<link href="/index.1234.css">')
+        self.assertEqual(rewrite_html_urls("<link href='/index.css'>"), "<link href='/index.1234.css'>")
+
+    def test_rendered_links_and_images_are_rewritten(self):
+        set_asset_urls({"/images/a.png": "/images/a.1234.png"})
+        image = text_node_to_html_node(TextNode("alt", text_type_image, "/images/a.png"))
+        link = text_node_to_html_node(TextNode("full size", text_type_link, "/images/a.png"))
+        self.assertEqual(image.props["src"], "/images/a.1234.png")
+        self.assertEqual(link.props["href"], "/images/a.1234.png")
+
+    def test_template_and_cache_keys_follow_the_mapping(self):
+        template_path = os.path.join(self.tmp.name, "template.html")
+        with open(template_path, 'w') as file:
+            file.write('<link href="/index.css">{{ Content }}')
+        self.assertEqual(load_template(template_path).render({"Content": ""}), '<link href="/index.css">')
+        plain_key = block_key("![a](/images/a.png)")
+        set_asset_urls({"/index.css": "/index.1234.css"})
+        self.assertEqual(load_template(template_path).render({"Content": ""}), '<link href="/index.1234.css">')
+        self.assertNotEqual(block_key("![a](/images/a.png)"), plain_key)
+        self.assertEqual(block_key("plain text"), block_key("plain text"))
+    def test_minified_templates_are_fingerprinted(self):
+        template_path = os.path.join(self.tmp.name, "template.html")
+        with open(template_path, 'w') as file:
+            file.write('<link href="/index.css" rel="stylesheet">\n  {{ Content }}')
+        set_asset_urls({"/index.css": "/index.1234.css"})
+        minify.set_minify(True)
+        try:
+            self.assertEqual(load_template(template_path).render({"Content": ""}), "<link href=/index.1234.css rel=stylesheet>")
+        finally:
+            minify.set_minify(False)
+
+if __name__ == "__main__":
+    unittest.main()
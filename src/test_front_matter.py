@@ -0,0 +1,86 @@
+import io
+import os
+import tempfile
+import unittest
+
+from front_matter import parse_front_matter, read_front_matter, read_header, scan_metadata
+
+class TestFrontMatter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_parse_scalars_lists_and_booleans(self):
+        metadata = parse_front_matter([
+            'title: "Hello: world"\n',
+            "date: 2024-05-01\n",
+            "tags: [tolkien, 'books']\n",
+            "draft: yes\n",
+            "# a comment\n",
+            "authors:\n",
+            "  - Bilbo\n",
+            "  - Frodo\n",
+        ])
+        self.assertEqual(metadata, {
+            "title": "Hello: world",
+            "date": "2024-05-01",
+            "tags": ["tolkien", "books"],
+            "draft": True,
+            "authors": ["Bilbo", "Frodo"],
+        })
+
+    def test_invalid_line_raises(self):
+        with self.assertRaises(ValueError):
+            parse_front_matter(["just text\n"])
+
+    def test_read_front_matter_leaves_file_at_body(self):
+        file = io.StringIO("---\ntitle: T\n---\n# Heading\n\nBody\n")
+        metadata, body_start = read_front_matter(file)
+        self.assertEqual(metadata, {"title": "T"})
+        self.assertEqual(file.read(), "# Heading\n\nBody\n")
+        self.assertEqual(body_start, len("---\ntitle: T\n---\n"))
+
+    def test_no_front_matter(self):
+        file = io.StringIO("# Heading\n")
+        self.assertEqual(read_front_matter(file), ({}, 0))
+        self.assertEqual(file.read(), "# Heading\n")
+
+    def test_unclosed_front_matter_raises(self):
+        with self.assertRaises(ValueError):
+            read_front_matter(io.StringIO("---\ntitle: T\n"))
+
+    def test_scan_metadata_defaults(self):
+        path = self.write("page.md", "Intro\n\n# The Title\n\nBody")
+        metadata = scan_metadata(path)
+        self.assertEqual(metadata["title"], "The Title")
+        self.assertEqual(metadata["tags"], [])
+        self.assertFalse(metadata["draft"])
+        self.assertRegex(metadata["date"], r"^\d{4}-\d{2}-\d{2}$")
+
+    def test_scan_metadata_from_header(self):
+        path = self.write("page.md", "---\ntitle: From header\ntags: a, b\ndate: 2020-01-02\n---\nno heading here")
+        metadata = scan_metadata(path)
+        self.assertEqual((metadata["title"], metadata["tags"], metadata["date"]), ("From header", ["a", "b"], "2020-01-02"))
+
+    def test_only_boolean_keys_become_booleans(self):
+        path = self.write("page.md", "---\ntitle: Yes\ndate: 2020-01-02\ntags: [no, On]\ndraft: off\n---\nBody")
+        metadata = scan_metadata(path)
+        self.assertEqual((metadata["title"], metadata["tags"], metadata["draft"]), ("Yes", ["no", "On"], False))
+        self.assertEqual(parse_front_matter(["draft: 'yes'\n", "public: yes\n"]), {"draft": True, "public": "yes"})
+
+    def test_untitled_draft_scans_without_error(self):
+        path = self.write("draft.md", "---\ndraft: true\n---\nnot written yet")
+        self.assertEqual(read_header(path), {"draft": True})
+        self.assertIsNone(scan_metadata(path)["title"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import HTMLNode
 from leafnode import LeafNode
@@ -50,6 +51,10 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(p, What a strange world, children: None, {'class': 'primary'})",
         )
 
+    def test_no_instance_dict(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("p", [LeafNode(None, "x")])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_to_html_no_children(self):
         node = LeafNode("p", "Hello, world!")
         self.assertEqual(node.to_html(), "<p>Hello, world!</p>")
@@ -102,6 +107,37 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_write_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("img", "", {"src": "a.png"}),
+            ],
+            {"class": "page"},
+        )
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), node.to_html())
+        self.assertEqual(
+            buffer.getvalue(),
+            '<div class="page"><p><b>Bold</b> text</p><img src="a.png"></div>',
+        )
+
+    def test_iter_html_deep_tree(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "leaf"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
+    def test_iter_html_invalid_child_raises(self):
+        child = ParentNode("span", [LeafNode(None, "x")])
+        child.children = []
+        with self.assertRaises(ValueError):
+            ParentNode("div", [child]).to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
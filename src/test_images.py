@@ -0,0 +1,106 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from asset_urls import set_image_variants
+from fingerprint import AssetHashes
+from images import image_size, process_images, read_png, resize_rows, unfilter, write_png
+from textnode import TextNode, text_node_to_html_node, text_type_image
+
+class TestImages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.src, "images"))
+
+    def tearDown(self):
+        set_image_variants({})
+        self.tmp.cleanup()
+
+    def write_bytes(self, rel_path, data):
+        path = os.path.join(self.src, rel_path)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def gradient_png(self, rel_path, width, height):
+        rows = [bytearray((x * 7 + y * 3 + c) & 0xFF for x in range(width) for c in range(3)) for y in range(height)]
+        path = os.path.join(self.src, rel_path)
+        write_png(path, width, height, 3, rows)
+        return path, rows
+
+    def test_image_size_from_headers(self):
+        path, _ = self.gradient_png("images/a.png", 12, 5)
+        self.assertEqual(image_size(path), (12, 5))
+        gif = self.write_bytes("images/b.gif", b"GIF89a" + struct.pack("<HH", 30, 20) + b"\0" * 20)
+        self.assertEqual(image_size(gif), (30, 20))
+        jpeg = self.write_bytes(
+            "images/c.jpg",
+            b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 4) + b"JF" + b"\xff\xc0" + struct.pack(">HBHH", 11, 8, 40, 64) + b"\0" * 6,
+        )
+        self.assertEqual(image_size(jpeg), (64, 40))
+        self.assertIsNone(image_size(self.write_bytes("images/d.png", b"not an image")))
+
+    def test_png_roundtrip(self):
+        path, rows = self.gradient_png("images/a.png", 9, 4)
+        self.assertEqual(read_png(path), (9, 4, 3, rows))
+
+    def test_unfilter_paeth_and_average(self):
+        previous = bytearray([10, 20, 30, 40])
+        self.assertEqual(unfilter(3, bytearray([1, 1, 1, 1]), previous, 1), bytearray([6, 14, 23, 32]))
+        self.assertEqual(unfilter(4, bytearray([1, 1, 1, 1]), previous, 1), bytearray([11, 21, 31, 41]))
+
+    def test_resize_averages_boxes(self):
+        rows = [bytearray([0, 100, 200, 100]), bytearray([100, 200, 100, 0])]
+        self.assertEqual(resize_rows(rows, 4, 2, 1, 2, 1), [bytearray([100, 100])])
+
+    def test_process_images_writes_variants_and_reuses_cache(self):
+        self.gradient_png("images/a.png", 40, 20)
+        files = [os.path.join("images", "a.png")]
+        variants, outputs = process_images(self.src, self.dst, files, AssetHashes(), [10, 20, 80], self.cache)
+        info = variants["/images/a.png"]
+        self.assertEqual((info["width"], info["height"]), (40, 20))
+        self.assertEqual([width for _, width in info["srcset"]], [10, 20])
+        small = os.path.join(self.dst, info["srcset"][0][0][1:])
+        self.assertEqual(image_size(small), (10, 5))
+        self.assertIn("image-manifest.json", outputs)
+        self.assertEqual(len(os.listdir(self.cache)), 2)
+
+        os.remove(small)
+        again, _ = process_images(self.src, self.dst, files, AssetHashes(), [10, 20, 80], self.cache)
+        self.assertEqual(again, variants)
+        self.assertTrue(os.path.exists(small))
+
+        self.gradient_png("images/a.png", 30, 20)
+        process_images(self.src, self.dst, files, AssetHashes(), [10, 20, 80], self.cache)
+        self.assertFalse(os.path.exists(small))
+
+    def test_damaged_image_falls_back_to_the_original(self):
+        path, _ = self.gradient_png("images/a.png", 40, 20)
+        with open(path, 'rb') as file:
+            data = file.read()
+        # Keep the header so the size is known, and cut the pixel data short.
+        self.write_bytes("images/a.png", data[:60])
+        files = [os.path.join("images", "a.png")]
+        variants, outputs = process_images(self.src, self.dst, files, AssetHashes(), [10, 20], self.cache)
+        self.assertEqual(variants["/images/a.png"], {"width": 40, "height": 20, "srcset": []})
+        self.assertEqual(outputs, ["image-manifest.json"])
+        self.assertEqual(os.listdir(self.cache), [])
+
+    def test_img_nodes_get_size_srcset_and_lazy_loading(self):
+        set_image_variants({"/images/a.png": {"width": 40, "height": 20, "srcset": [["/images/a.1234.10w.png", 10]]}})
+        node = text_node_to_html_node(TextNode("a", text_type_image, "/images/a.png"))
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/images/a.png" alt="a" width="40" height="20" '
+            'srcset="/images/a.1234.10w.png 10w, /images/a.png 40w" sizes="(max-width: 40px) 100vw, 40px" loading="lazy">',
+        )
+        other = text_node_to_html_node(TextNode("b", text_type_image, "/images/b.png"))
+        self.assertEqual(other.to_html(), '<img src="/images/b.png" alt="b">')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -386,5 +386,33 @@ class TestInlineMarkdown(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_plain(self):
+        self.assertListEqual(text_to_textnodes("just text"), [TextNode("just text", text_type_text)])
+        self.assertListEqual(text_to_textnodes(""), [])
+
+    def test_text_to_textnodes_unmatched_brackets_stay_text(self):
+        self.assertListEqual(
+            text_to_textnodes("a [b and ![c] then [d](/e)"),
+            [
+                TextNode("a [b and ![c] then ", text_type_text),
+                TextNode("d", text_type_link, "/e"),
+            ],
+        )
+
+    def test_text_to_textnodes_delimiters_win_inside_brackets(self):
+        self.assertListEqual(
+            text_to_textnodes("[*a*](/b)"),
+            [
+                TextNode("[", text_type_text),
+                TextNode("a", text_type_italic),
+                TextNode("](/b)", text_type_text),
+            ],
+        )
+
+    def test_text_to_textnodes_mismatched_delimiter(self):
+        with self.assertRaises(ValueError) as context:
+            text_to_textnodes("an **unclosed bold")
+        self.assertEqual(str(context.exception), "Mismatched delimiter found in text node.")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
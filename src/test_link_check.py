@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from block_markdown import iter_numbered_blocks
+from link_check import LinkChecker, check_links, output_paths, page_links, resolve_url
+from page_writer import MemoryWriter
+
+class TestLinkCheck(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        for name, text in (
+            ("index.html", "<p>home</p>"),
+            ("blog/index.html", '<h1 id="top">Blog</h1><p id=intro>x</p>'),
+            ("blog/a.html", "<p>a</p>"),
+            ("images/cat.png", "png"),
+        ):
+            self.write(os.path.join(self.public, name), text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def test_numbered_blocks(self):
+        lines = ["\n", "# A\n", "\n", "\n", "  \n", "b\n", "c\n"]
+        self.assertEqual(list(iter_numbered_blocks(lines)), [(2, "# A"), (6, "b\nc")])
+
+    def test_page_links_have_source_lines(self):
+        path = self.write(os.path.join(self.tmp.name, "page.md"), (
+            "---\ntitle: T\n---\n# T\n\nSee `[not](/a link)` and [one](/one)\n"
+            "then ![two](/two.png)\n\n- [three](three.html)\n"
+        ))
+        self.assertEqual(list(page_links(path)), [
+            (6, "link", "/one"),
+            (7, "image", "/two.png"),
+            (9, "link", "three.html"),
+        ])
+        path = self.write(os.path.join(self.tmp.name, "plain.md"), "# Ünïcode\n\n\n[one](/one)\n")
+        self.assertEqual(list(page_links(path)), [(4, "link", "/one")])
+
+    def test_resolve_url(self):
+        self.assertEqual(resolve_url("a.html#x", "/blog/b.html"), ("/blog/a.html", "x"))
+        self.assertEqual(resolve_url("../images/cat.png", "/blog/"), ("/images/cat.png", ""))
+        self.assertEqual(resolve_url("blog/", "/"), ("/blog/", ""))
+        self.assertEqual(resolve_url("blog/a.html", "/about.html"), ("/blog/a.html", ""))
+        self.assertEqual(resolve_url("#top", "/blog/"), ("/blog/", "top"))
+        self.assertIsNone(resolve_url("https://example.com/x", "/"))
+        self.assertIsNone(resolve_url("mailto:someone@example.com", "/"))
+
+    def test_checker(self):
+        checker = LinkChecker(self.public)
+        self.assertEqual(checker.paths, {"/index.html", "/blog/index.html", "/blog/a.html", "/images/cat.png"})
+        self.assertIsNone(checker.check("/blog", "/"))
+        self.assertIsNone(checker.check("/blog/#intro", "/"))
+        self.assertIsNone(checker.check("a.html", "/blog/"))
+        self.assertEqual(checker.check("/blog/missing.html", "/"), "no output at /blog/missing.html")
+        self.assertEqual(checker.check("/blog/#gone", "/"), "no element with id 'gone' in /blog/index.html")
+
+    def test_check_links_includes_memory_outputs(self):
+        writer = MemoryWriter()
+        writer.submit(os.path.join(self.public, "tags", "x", "index.html"), '<a id="x">x</a>')
+        writer.files = {os.path.join("images", "cat.png")}
+        self.assertIn("/tags/x/index.html", output_paths(self.public, writer.pages))
+        page = self.write(os.path.join(self.tmp.name, "page.md"), "# P\n\n[x](/tags/x/#x) [y](/tags/y/)\n\n![c](/images/cat.png) [a](/blog/a.html)\n")
+        checked, broken = check_links([(page, "/page.html")], self.public, writer)
+        self.assertEqual(checked, 4)
+        # Pages on disk are not part of a site kept in memory.
+        self.assertEqual(broken, [
+            (page, 3, "link", "/tags/y/", "no output at /tags/y/"),
+            (page, 5, "link", "/blog/a.html", "no output at /blog/a.html"),
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
+import contextlib
+import io
+import os
+import tempfile
+import threading
 import unittest
 
 from main import *
+from parse_cache import block_key
 
 class TestExtractTitle(unittest.TestCase):
 
@@ -38,5 +44,359 @@ More text
         markdown = "# This is **bold** and *italic*"
         self.assertEqual(extract_title(markdown), "This is **bold** and *italic*")
 
+class TestGeneratePages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        with open(self.template, 'w') as file:
+            file.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, name, markdown):
+        with open(os.path.join(self.content, name), 'w') as file:
+            file.write(markdown)
+
+    def read_output(self, name):
+        with open(os.path.join(self.public, name)) as file:
+            return file.read()
+
+    def test_collect_pages_is_sorted_and_maps_to_html(self):
+        self.write_page("index.md", "# Home")
+        self.write_page("blog/b.md", "# B")
+        self.write_page("blog/a.md", "# A")
+        self.assertEqual(
+            collect_pages(self.content, self.public),
+            [
+                (os.path.join(self.content, "blog", "a.md"), os.path.join(self.public, "blog", "a.html")),
+                (os.path.join(self.content, "blog", "b.md"), os.path.join(self.public, "blog", "b.html")),
+                (os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html")),
+            ],
+        )
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join(self.public, "index.html"), self.public), "/")
+        self.assertEqual(page_url(os.path.join(self.public, "blog", "index.html"), self.public), "/blog/")
+        self.assertEqual(page_url(os.path.join(self.public, "blog", "a.html"), self.public), "/blog/a.html")
+
+    def test_template_placeholders(self):
+        with open(self.template, 'w') as file:
+            file.write("{{ Title }}|{{ Path }}|{{ Section }}")
+        self.write_page("blog/a.md", "# A")
+        generate_page(
+            os.path.join(self.content, "blog", "a.md"), self.template,
+            os.path.join(self.public, "blog", "a.html"), values={"Path": "/blog/a.html", "Section": "blog"},
+        )
+        self.assertEqual(self.read_output("blog/a.html"), "A|/blog/a.html|blog")
+
+    def test_parallel_build_matches_sequential(self):
+        for i in range(4):
+            self.write_page(f"blog/post{i}.md", f"# Post {i}\n\nSome **bold** text")
+        generate_pages_recursive(self.content, self.template, self.public, jobs=2)
+        self.assertEqual(
+            self.read_output("blog/post3.html"),
+            '<title>Post 3</title><div><h1 id="post-3">Post 3</h1><p>Some <b>bold</b> text</p></div>',
+        )
+
+    def test_parallel_build_sends_workers_only_their_blocks(self):
+        self.write_page("a.md", "# A\n\nShared")
+        self.write_page("b.md", "# B\n\nShared")
+        cache = ParseCache()
+        cache.merge({"unrelated": "<p>x</p>"})
+        self.assertEqual(cached_blocks(cache, os.path.join(self.content, "a.md")), {})
+        generate_pages_recursive(self.content, self.template, self.public, jobs=2, cache=cache)
+        self.assertEqual(cached_blocks(cache, os.path.join(self.content, "b.md")),
+                         {block_key("# B"): '<h1 id="b">B</h1>', block_key("Shared"): "<p>Shared</p>"})
+        generate_pages_recursive(self.content, self.template, self.public, jobs=2, cache=cache)
+        self.assertEqual(self.read_output("b.html"), '<title>B</title><div><h1 id="b">B</h1><p>Shared</p></div>')
+
+    def test_writer_hand_off_is_the_profiled_write_stage(self):
+        class SlowWriter:
+            def submit(self, dest_path, text, key=None):
+                time.sleep(0.01)
+                self.text = text
+
+        self.write_page("a.md", "# A")
+        writer = SlowWriter()
+        stats = PageStats("a.md")
+        messages = []
+        generate_page(os.path.join(self.content, "a.md"), self.template, os.path.join(self.public, "a.html"),
+                      log=messages.append, stats=stats, writer=writer)
+        self.assertEqual(writer.text, '<title>A</title><div><h1 id="a">A</h1></div>')
+        self.assertGreaterEqual(stats.stages["write"], 0.01)
+        self.assertEqual(messages[-1], f"Page rendered, queued for writing: {os.path.join(self.public, 'a.html')}")
+
+    def test_background_writer_build(self):
+        for i in range(3):
+            self.write_page(f"blog/post{i}.md", f"# Post {i}")
+        generate_pages_recursive(self.content, self.template, self.public, writer_threads=2)
+        self.assertEqual(self.read_output("blog/post2.html"), '<title>Post 2</title><div><h1 id="post-2">Post 2</h1></div>')
+        self.assertEqual(sorted(os.listdir(os.path.join(self.public, "blog"))), ["post0.html", "post1.html", "post2.html"])
+
+    def test_full_rebuild_keeps_identical_outputs(self):
+        self.write_page("index.md", "# Home")
+        self.write_page("blog/a.md", "# A")
+        generate_pages_recursive(self.content, self.template, self.public)
+        index = os.path.join(self.public, "index.html")
+        os.utime(index, (0, 0))
+        self.write_page("blog/a.md", "# A changed")
+        generate_pages_recursive(self.content, self.template, self.public)
+        self.assertEqual(os.path.getmtime(index), 0)
+        self.assertEqual(self.read_output("blog/a.html"), '<title>A changed</title><div><h1 id="a-changed">A changed</h1></div>')
+
+    def test_failures_are_aggregated(self):
+        self.write_page("good.md", "# Good")
+        self.write_page("bad1.md", "no title")
+        self.write_page("bad2.md", "no title either")
+        with self.assertRaises(Exception) as context:
+            generate_pages_recursive(self.content, self.template, self.public, jobs=2)
+        self.assertIn("2 of 3 pages failed to generate", str(context.exception))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "good.html")))
+
+    def test_front_matter_values_and_template(self):
+        with open(os.path.join(self.tmp.name, "post.html"), 'w') as file:
+            file.write("{{ Title }}|{{ Date }}|{{ Tags }}|{{ Content }}")
+        self.write_page("blog/a.md", "---\ntitle: Front\ndate: 2024-01-02\ntags: [x, y]\ntemplate: post.html\n---\n# Heading\n")
+        generate_pages_recursive(self.content, self.template, self.public)
+        self.assertEqual(self.read_output("blog/a.html"), 'Front|2024-01-02|x, y|<div><h1 id="heading">Heading</h1></div>')
+
+    def test_other_front_matter_keys_are_placeholders(self):
+        with open(self.template, 'w') as file:
+            file.write("{{ Title }} by {{ Author }} ({{ Editors }}) at {{ Path }}")
+        self.write_page("a.md", "---\nauthor: Bilbo\neditors: [Frodo, Sam]\npath: /elsewhere\n---\n# Heading\n")
+        generate_pages_recursive(self.content, self.template, self.public)
+        self.assertEqual(self.read_output("a.html"), "Heading by Bilbo (Frodo, Sam) at /a.html")
+
+    def test_drafts_are_skipped_unless_requested(self):
+        self.write_page("index.md", "# Home")
+        self.write_page("draft.md", "---\ndraft: true\n---\nno title yet")
+        self.assertEqual(
+            generate_pages_recursive(self.content, self.template, self.public),
+            [(os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html"))],
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.public, "draft.html")))
+
+        self.write_page("draft.md", "---\ndraft: true\n---\n# Draft")
+        manifest = BuildManifest()
+        apply_render_options(parse_args(["--drafts"]))
+        try:
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        finally:
+            apply_render_options(parse_args([]))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "draft.html")))
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "draft.html")))
+        self.assertNotIn(os.path.join(self.content, "draft.md"), manifest.pages)
+
+    def test_incremental_skips_unchanged_and_prunes_deleted(self):
+        self.write_page("index.md", "# Home")
+        self.write_page("old.md", "# Old")
+        manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        os.remove(os.path.join(self.content, "old.md"))
+        os.utime(os.path.join(self.public, "index.html"), (0, 0))
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        self.assertEqual(os.path.getmtime(os.path.join(self.public, "index.html")), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "old.html")))
+
+    def test_file_date_is_an_input_of_undated_pages(self):
+        self.write_page("dated.md", "---\ndate: 2024-01-01\n---\n# Dated")
+        self.write_page("undated.md", "# Undated")
+        manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        self.assertNotIn("date", manifest.pages[os.path.join(self.content, "dated.md")]["inputs"])
+
+        for name in ("dated.md", "undated.md"):
+            os.utime(os.path.join(self.content, name), (86400 * 365, 86400 * 365))
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        undated = manifest.pages[os.path.join(self.content, "undated.md")]
+        self.assertEqual(undated["reasons"], ["date changed"])
+        self.assertEqual(undated["inputs"]["date"], file_date(os.path.join(self.content, "undated.md")))
+        self.assertEqual(manifest.pages[os.path.join(self.content, "dated.md")]["reasons"], ["new page"])
+
+    def test_rebuild_changes_only_touches_changed_pages(self):
+        self.write_page("index.md", "# Home")
+        self.write_page("blog/a.md", "# A")
+        manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        os.utime(os.path.join(self.public, "index.html"), (0, 0))
+
+        self.write_page("blog/a.md", "# A again")
+        os.remove(os.path.join(self.content, "index.md"))
+        changed = {os.path.join(self.content, "blog", "a.md")}
+        removed = {os.path.join(self.content, "index.md")}
+        static = os.path.join(self.tmp.name, "static")
+        rebuild_changes(changed, removed, self.content, static, self.template, self.public, manifest, parse_args([]))
+
+        self.assertIn("A again", self.read_output("blog/a.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+        self.assertEqual(list(manifest.pages), [os.path.join(self.content, "blog", "a.md")])
+
+    def test_page_rebuilds_when_a_missing_static_file_appears(self):
+        static = os.path.join(self.tmp.name, "static")
+        os.makedirs(static)
+        self.write_page("index.md", "# Home\n\n![soon](/soon.png) [other](/blog/)")
+        manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, self.public, manifest, static_dir=static)
+        image = os.path.join(static, "soon.png")
+        self.assertEqual(manifest.dependents(image), {os.path.join(self.content, "index.md")})
+
+        with open(image, 'w') as file:
+            file.write("png")
+        rebuild_changes({image}, set(), self.content, static, self.template, self.public, manifest, parse_args([]))
+        self.assertEqual(manifest.pages[os.path.join(self.content, "index.md")]["reasons"], [f"{image} changed"])
+
+    def test_partial_change_rebuilds_only_dependents(self):
+        partial = os.path.join(self.tmp.name, "nav.html")
+        with open(partial, 'w') as file:
+            file.write("<nav>v1</nav>")
+        with open(self.template, 'w') as file:
+            file.write("{{> nav.html }}{{ Content }}")
+        static = os.path.join(self.tmp.name, "static")
+        os.makedirs(static)
+        image = os.path.join(static, "a.png")
+        with open(image, 'w') as file:
+            file.write("png")
+        self.write_page("index.md", "# Home\n\n![a](/a.png)")
+        self.write_page("blog/a.md", "# A")
+        manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, self.public, manifest, static_dir=static)
+
+        self.assertEqual(manifest.dependents(image), {os.path.join(self.content, "index.md")})
+        self.assertEqual(len(manifest.dependents(partial)), 2)
+
+        os.utime(os.path.join(self.public, "blog", "a.html"), (0, 0))
+        with open(image, 'w') as file:
+            file.write("new png")
+        rebuild_changes({image}, set(), self.content, static, self.template, self.public, manifest, parse_args([]))
+        self.assertEqual(os.path.getmtime(os.path.join(self.public, "blog", "a.html")), 0)
+        self.assertEqual(manifest.pages[os.path.join(self.content, "index.md")]["reasons"], [f"{image} changed"])
+
+        with open(partial, 'w') as file:
+            file.write("<nav>v2</nav>")
+        rebuild_changes({partial}, set(), self.content, static, self.template, self.public, manifest, parse_args([]))
+        self.assertTrue(self.read_output("blog/a.html").startswith("<nav>v2</nav>"))
+
+    def test_site_index_follows_rebuilds(self):
+        self.write_page("blog/a.md", "---\ndate: 2024-01-01\ntags: [x]\n---\n# A")
+        self.write_page("blog/b.md", "---\ndate: 2024-02-01\n---\n# B")
+        args = parse_args(["--site-index"])
+        manifest = BuildManifest()
+        pages = generate_pages_recursive(self.content, self.template, self.public, manifest)
+        self.assertIn(os.path.join("tags", "x", "index.html"), update_site_index(pages, self.template, self.public, manifest, args))
+        self.assertIn('<a href="/blog/b.html">B</a>', self.read_output("archive/index.html"))
+
+        self.write_page("blog/b.md", "---\ndate: 2024-02-01\n---\n# B renamed")
+        changed = {os.path.join(self.content, "blog", "b.md")}
+        rebuild_changes(changed, set(), self.content, "static", self.template, self.public, manifest, args)
+        self.assertIn('<a href="/blog/b.html">B renamed</a>', self.read_output("archive/index.html"))
+        self.assertEqual(manifest.index["entries"][os.path.join(self.content, "blog", "a.md")]["tags"], ["x"])
+
+    def test_watch_rebuild_precompresses_only_touched_outputs(self):
+        self.write_page("a.md", "# A\n\n" + "text " * 300)
+        self.write_page("b.md", "# B\n\n" + "text " * 300)
+        args = parse_args(["--precompress", "--compress-min-size", "100"])
+        manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        precompress_directory(self.public, min_size=100)
+        os.remove(os.path.join(self.public, "b.html.gz"))
+
+        self.write_page("a.md", "# A changed\n\n" + "text " * 300)
+        os.remove(os.path.join(self.content, "b.md"))
+        changed = {os.path.join(self.content, "a.md")}
+        removed = {os.path.join(self.content, "b.md")}
+        with open(os.path.join(self.public, "stray.html"), 'w') as file:
+            file.write("stray " * 300)
+        rebuild_changes(changed, removed, self.content, "static", self.template, self.public, manifest, args)
+        self.assertEqual(os.path.getmtime(os.path.join(self.public, "a.html.gz")),
+                         os.path.getmtime(os.path.join(self.public, "a.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "stray.html.gz")))
+
+    def test_search_terms_and_links_are_cached_by_source_hash(self):
+        self.write_page("a.md", "# A\n\nalpha [b](/b.html)")
+        self.write_page("b.md", "# B\n\nbeta")
+        args = parse_args(["--search-index", "--check-links"])
+        manifest = BuildManifest()
+        pages = generate_pages_recursive(self.content, self.template, self.public, manifest)
+        update_search_index(pages, self.public, manifest)
+        check_site_links(pages, self.public, manifest=manifest)
+        b = os.path.join(self.content, "b.md")
+        cached = [manifest.sources[name][b] for name in ("search", "links")]
+
+        self.write_page("a.md", "# A\n\ngamma [b](/b.html)")
+        rebuild_changes({os.path.join(self.content, "a.md")}, set(), self.content, "static", self.template, self.public, manifest, args)
+        self.assertTrue(all(manifest.sources[name][b] is entry for name, entry in zip(("search", "links"), cached)))
+        self.assertIn("gamma", manifest.sources["search"][os.path.join(self.content, "a.md")][1][1])
+
+        os.remove(b)
+        rebuild_changes(set(), {b}, self.content, "static", self.template, self.public, manifest, args)
+        self.assertNotIn(b, manifest.sources["search"])
+
+    def test_links_to_headings_of_built_pages(self):
+        self.write_page("a.md", "# A\n\n## Top\n\n[t](#top) [b](/b.html#more-details) [u](#nowhere)")
+        self.write_page("b.md", "# B\n\n### More *details*")
+        pages = generate_pages_recursive(self.content, self.template, self.public)
+        broken = check_site_links(pages, self.public)
+        self.assertEqual([url for _, _, _, url, _ in broken], ["#nowhere"])
+
+    def test_watch_keeps_edits_made_during_a_rebuild(self):
+        self.write_page("index.md", "# Home")
+        manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        args = parse_args(["--manifest", os.path.join(self.tmp.name, "manifest.json")])
+        rebuilds = []
+
+        def on_rebuild():
+            rebuilds.append(self.read_output("index.html"))
+            if len(rebuilds) == 1:
+                # Saved after the rebuild read the page, before the watcher looks again.
+                self.write_page("index.md", "# Home, edited during the rebuild")
+            else:
+                raise KeyboardInterrupt
+
+        watcher = threading.Thread(target=watch_site, args=(
+            self.content, os.path.join(self.tmp.name, "static"), self.template, self.public, manifest, args,
+        ), kwargs={"on_rebuild": on_rebuild}, daemon=True)
+        watcher.start()
+        time.sleep(0.3)
+        self.write_page("index.md", "# Home, edited")
+        watcher.join(10)
+        self.assertFalse(watcher.is_alive())
+        self.assertEqual(rebuilds[-1], '<title>Home, edited during the rebuild</title><div><h1 id="home-edited-during-the-rebuild">Home, edited during the rebuild</h1></div>')
+
+    def test_templates_picked_by_pages_are_watched(self):
+        with open(os.path.join(self.tmp.name, "nav.html"), 'w') as file:
+            file.write("<nav></nav>")
+        with open(os.path.join(self.tmp.name, "alt.html"), 'w') as file:
+            file.write("{{> nav.html }}{{ Content }}")
+        self.write_page("a.md", "---\ntemplate: alt.html\n---\n# A\n\n![x](/x.png)")
+        static = os.path.join(self.tmp.name, "static")
+        manifest = BuildManifest()
+        generate_pages_recursive(self.content, self.template, self.public, manifest, static_dir=static)
+        self.assertEqual(watched_paths(self.content, static, self.template, manifest), [
+            self.content, static, self.template,
+            os.path.join(self.tmp.name, "alt.html"), os.path.join(self.tmp.name, "nav.html"),
+        ])
+
+    def test_explain_and_log_use_the_page_template(self):
+        alt = os.path.join(self.tmp.name, "alt.html")
+        with open(alt, 'w') as file:
+            file.write("{{ Content }}")
+        self.write_page("a.md", "---\ntemplate: alt.html\n---\n# A")
+        manifest = BuildManifest()
+        messages = []
+        generate_page(os.path.join(self.content, "a.md"), self.template, os.path.join(self.public, "a.html"), log=messages.append)
+        self.assertTrue(messages[0].endswith(f"using {alt}"))
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            explain_page(os.path.join(self.content, "a.md"), self.template, self.public, None, manifest)
+        self.assertTrue(output.getvalue().endswith("Up to date\n"))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from block_markdown import markdown_to_html_node
+from leafnode import LeafNode
+from minify import minify_markup, set_minify
+from parentnode import ParentNode
+from template import Template
+
+class TestMinify(unittest.TestCase):
+
+    def setUp(self):
+        set_minify(True)
+
+    def tearDown(self):
+        set_minify(False)
+
+    def test_template_markup(self):
+        markup = (
+            "<!DOCTYPE html>\n<html>\n\n<head>\n    <meta charset=\"utf-8\">\n"
+            "    <title> {{ Title }} </title>\n    <!-- styles -->\n"
+            "    <link href=\"/index.css\" rel=\"stylesheet\">\n</head>\n"
+            "<body>\n    <article>\n        {{ Content }}\n    </article>\n"
+            "    <p>Hello   <b>you</b>  there</p>\n</body>\n\n</html>"
+        )
+        self.assertEqual(
+            minify_markup(markup),
+            "<!DOCTYPE html><html><head><meta charset=utf-8><title>{{ Title }}</title>"
+            "<link href=/index.css rel=stylesheet></head><body><article>{{ Content }}</article>"
+            "<p>Hello <b>you</b> there</p></body></html>",
+        )
+
+    def test_template_keeps_raw_elements_and_placeholder_attributes(self):
+        markup = '<pre>\n  a   b\n</pre>\n<a href="{{ Path }}" class="x y">  link </a>'
+        self.assertEqual(minify_markup(markup), '<pre>\n  a   b\n</pre><a href="{{ Path }}" class="x y"> link </a>')
+
+    def test_template_parse_minifies(self):
+        template = Template.parse("<div>\n  {{ Title }}\n</div>")
+        self.assertEqual(template.render({"Title": "T"}), "<div>T</div>")
+
+    def test_nodes_collapse_whitespace_and_quotes(self):
+        node = ParentNode("p", [
+            LeafNode(None, "some   spaced\n text "),
+            LeafNode("a", "link", {"href": "/a b", "title": "plain"}),
+        ])
+        self.assertEqual(node.to_html(), '<p>some spaced text <a href="/a b" title=plain>link</a></p>')
+
+    def test_code_blocks_are_untouched(self):
+        node = markdown_to_html_node("```\ndef f():\n    return  1\n```\n\nsome    text and `a  b`")
+        self.assertEqual(
+            node.to_html(),
+            "<div><pre><code>def f():\n    return  1\n</code></pre><p>some text and <code>a  b</code></p></div>",
+        )
+
+    def test_disabled_output_is_unchanged(self):
+        set_minify(False)
+        node = ParentNode("p", [LeafNode(None, "a  b"), LeafNode("a", "x", {"href": "/"})])
+        self.assertEqual(node.to_html(), '<p>a  b<a href="/">x</a></p>')
+
+if __name__ == "__main__":
+    unittest.main()
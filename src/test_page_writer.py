@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from page_writer import AtomicFile, MemoryWriter, PageWriter, write_atomic
+
+class TestPageWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_write_atomic_replaces_file(self):
+        path = os.path.join(self.dir, "page.html")
+        write_atomic(path, "old")
+        write_atomic(path, "new")
+        self.assertEqual(self.read(path), "new")
+        self.assertEqual(os.listdir(self.dir), ["page.html"])
+
+    def test_failed_write_keeps_old_file(self):
+        path = os.path.join(self.dir, "page.html")
+        write_atomic(path, "old")
+        with self.assertRaises(RuntimeError):
+            with AtomicFile(path) as file:
+                file.write("partial")
+                raise RuntimeError("render failed")
+        self.assertEqual(self.read(path), "old")
+        self.assertEqual(os.listdir(self.dir), ["page.html"])
+
+    def test_identical_output_keeps_old_file(self):
+        path = os.path.join(self.dir, "page.html")
+        self.assertTrue(write_atomic(path, "same"))
+        os.utime(path, (0, 0))
+        self.assertFalse(write_atomic(path, "same"))
+        output_file = AtomicFile(path)
+        with output_file as file:
+            file.write("same")
+        self.assertFalse(output_file.changed)
+        self.assertEqual(os.path.getmtime(path), 0)
+        self.assertTrue(write_atomic(path, "diff"))
+        self.assertEqual(self.read(path), "diff")
+        self.assertEqual(os.listdir(self.dir), ["page.html"])
+
+    def test_writer_counts_unchanged_pages(self):
+        path = os.path.join(self.dir, "page.html")
+        write_atomic(path, "same")
+        writer = PageWriter(threads=1)
+        writer.submit(path, "same")
+        writer.submit(os.path.join(self.dir, "other.html"), "new")
+        writer.close()
+        self.assertEqual((writer.written, writer.unchanged), (1, 1))
+
+    def test_writer_creates_directories_once(self):
+        writer = PageWriter(threads=2, max_pending=2)
+        paths = [os.path.join(self.dir, "blog", f"post{i}.html") for i in range(10)]
+        for i, path in enumerate(paths):
+            writer.submit(path, f"post {i}")
+        self.assertEqual(writer.close(), {})
+        self.assertEqual(self.read(paths[7]), "post 7")
+        self.assertEqual(writer.created_dirs, {os.path.join(self.dir, "blog")})
+
+    def test_writer_collects_failures_by_key(self):
+        blocker = os.path.join(self.dir, "file")
+        write_atomic(blocker, "not a directory")
+        writer = PageWriter(threads=1)
+        writer.submit(os.path.join(blocker, "page.html"), "x", "content/page.md")
+        failures = writer.close()
+        self.assertEqual(list(failures), ["content/page.md"])
+
+    def test_memory_writer_counts_per_batch(self):
+        writer = MemoryWriter()
+        writer.submit("public/a.html", "a")
+        writer.submit("public/b.html", "b")
+        self.assertEqual(writer.close(), {})
+        self.assertEqual((writer.written, writer.unchanged), (2, 0))
+        writer.submit("public/a.html", "a")
+        writer.close()
+        self.assertEqual((writer.written, writer.unchanged), (0, 1))
+        self.assertEqual(writer.get("public/a.html")[0], b"a")
+        writer.remove("public/a.html")
+        self.assertIsNone(writer.get("public/a.html"))
+        self.assertEqual(os.listdir(self.dir), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import os
+import tempfile
+import unittest
+
+from block_markdown import markdown_to_html_node, write_markdown_html
+from parse_cache import ParseCache, block_key
+
+class TestParseCache(unittest.TestCase):
+
+    def test_get_miss_then_hit(self):
+        cache = ParseCache()
+        key, html = cache.get("Some text")
+        self.assertIsNone(html)
+        self.assertEqual(key, block_key("Some text"))
+        cache.put(key, "<p>Some text</p>")
+        self.assertEqual(cache.get("Some text"), (key, "<p>Some text</p>"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = ParseCache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.entries.move_to_end("a")
+        cache.put("c", "cccc")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.size, 8)
+
+    def test_size_counts_encoded_bytes(self):
+        cache = ParseCache(max_bytes=10)
+        cache.put("a", "ééé")
+        self.assertEqual(cache.size, 6)
+        cache.put("a", "ü")
+        self.assertEqual(cache.size, 2)
+        cache.put("b", "ßßßßß")
+        self.assertEqual(list(cache.entries), ["b"])
+        self.assertEqual(cache.size, 10)
+
+    def test_save_load_and_version_invalidation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            cache = ParseCache()
+            cache.put("a", "<p>a</p>")
+            cache.save(path)
+            self.assertEqual(dict(ParseCache.load(path).entries), {"a": "<p>a</p>"})
+
+            stale = ParseCache(version="old")
+            stale.put("a", "<p>a</p>")
+            stale.save(path)
+            self.assertEqual(len(ParseCache.load(path).entries), 0)
+
+    def test_take_added_and_merge(self):
+        worker = ParseCache()
+        worker.put("a", "<p>a</p>")
+        added = worker.take_added()
+        self.assertEqual(worker.take_added(), {})
+        parent = ParseCache()
+        parent.merge(added)
+        self.assertEqual(dict(parent.entries), {"a": "<p>a</p>"})
+
+    def test_entries_for_and_empty_copy(self):
+        cache = ParseCache(max_bytes=100, version="v")
+        cache.put(block_key("a"), "<p>a</p>")
+        cache.put(block_key("b"), "<p>b</p>")
+        self.assertEqual(cache.entries_for(["b", "c"]), {block_key("b"): "<p>b</p>"})
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        copy = cache.empty_copy()
+        self.assertEqual((copy.max_bytes, copy.version, len(copy.entries)), (100, "v", 0))
+
+    def test_cached_render_matches_uncached(self):
+        md = "# Title\n\nSome **bold** text\n\n* a\n* b\n\nSome **bold** text\n"
+        cache = ParseCache()
+        for _ in range(2):
+            buffer = io.StringIO()
+            write_markdown_html(io.StringIO(md), buffer, cache=cache)
+            self.assertEqual(buffer.getvalue(), markdown_to_html_node(md).to_html())
+        self.assertEqual((cache.hits, cache.misses), (5, 3))
+
+if __name__ == "__main__":
+    unittest.main()
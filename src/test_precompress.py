@@ -0,0 +1,83 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from precompress import brotli, compressed_suffixes, precompress_directory, precompress_files
+
+class TestPrecompress(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, content):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_compresses_text_outputs_over_the_threshold(self):
+        page = self.write("blog/post.html", "<p>hello</p>" * 200)
+        self.write("small.css", "body {}")
+        self.write("image.png", "x" * 5000)
+        self.assertEqual(
+            precompress_directory(self.root, min_size=100),
+            [os.path.join("blog", "post.html") + suffix for suffix in compressed_suffixes()],
+        )
+        with gzip.open(page + ".gz", 'rt') as file:
+            self.assertEqual(file.read(), "<p>hello</p>" * 200)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "small.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "image.png.gz")))
+        self.assertEqual(os.path.exists(page + ".br"), brotli is not None)
+
+    def test_up_to_date_copies_are_skipped(self):
+        page = self.write("index.html", "<p>hello</p>" * 200)
+        precompress_directory(self.root, min_size=100)
+        os.utime(page + ".gz", ns=(0, os.stat(page).st_mtime_ns))
+        with open(page + ".gz", 'rb') as file:
+            first = file.read()
+        precompress_directory(self.root, min_size=100)
+        with open(page + ".gz", 'rb') as file:
+            self.assertEqual(file.read(), first)
+
+        self.write("index.html", "<p>changed</p>" * 200)
+        os.utime(page, ns=(0, 1))
+        precompress_directory(self.root, min_size=100)
+        with gzip.open(page + ".gz", 'rt') as file:
+            self.assertEqual(file.read(), "<p>changed</p>" * 200)
+
+    def test_stale_copies_are_removed(self):
+        page = self.write("index.html", "<p>hello</p>" * 200)
+        precompress_directory(self.root, min_size=100)
+        os.remove(page)
+        precompress_directory(self.root, min_size=100)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_parallel_matches_sequential(self):
+        for i in range(4):
+            self.write(f"post{i}.html", f"<p>post {i}</p>" * 200)
+        precompress_directory(self.root, jobs=2, min_size=100)
+        with gzip.open(os.path.join(self.root, "post3.html.gz"), 'rt') as file:
+            self.assertEqual(file.read(), "<p>post 3</p>" * 200)
+    def test_precompress_files_looks_only_at_the_given_outputs(self):
+        touched = self.write("a.html", "<p>a</p>" * 200)
+        untouched = self.write("b.html", "<p>b</p>" * 200)
+        gone = self.write("c.html", "<p>c</p>" * 200)
+        precompress_directory(self.root, min_size=100)
+        os.remove(untouched + ".gz")
+        os.remove(gone)
+        self.write("a.html", "<p>new</p>" * 200)
+        precompress_files(self.root, ["a.html", "c.html", "logo.png"], min_size=100)
+        with gzip.open(touched + ".gz", 'rt') as file:
+            self.assertEqual(file.read(), "<p>new</p>" * 200)
+        self.assertFalse(os.path.exists(gone + ".gz"))
+        self.assertFalse(os.path.exists(untouched + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+from page_writer import MemoryWriter
+from search_index import (
+    SearchIndexBuilder, build_search_index, decode_postings, encode_postings, page_terms, shard_name, tokenize,
+)
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, name, markdown):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as file:
+            file.write(markdown)
+        return path
+
+    def read_json(self, name):
+        with open(os.path.join(self.public, "search", name)) as file:
+            return json.load(file)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Hobbit's 2nd edition, a é-Élan"), ["the", "hobbit", "2nd", "edition", "élan"])
+
+    def test_page_terms_come_from_text_nodes(self):
+        path = self.write_page("a.md", "---\ntitle: Rings\n---\n# The Rings\n\n- a [link text](/x) and ![alt words](/i.png)\n")
+        title, counts = page_terms(path)
+        self.assertEqual(title, "Rings")
+        self.assertEqual(counts["rings"], 2)
+        self.assertEqual((counts["link"], counts["alt"], counts["and"]), (1, 1, 1))
+        self.assertNotIn("png", counts)
+
+    def test_postings_round_trip(self):
+        postings = [(3, 1), (4, 2), (10, 1)]
+        self.assertEqual(encode_postings(postings), [3, 1, 1, 2, 6, 1])
+        self.assertEqual(decode_postings(encode_postings(postings)), postings)
+
+    def test_shard_names(self):
+        self.assertEqual(shard_name("hobbit"), "ho")
+        self.assertEqual(shard_name("élan"), "_c3a96c")
+        self.assertEqual(shard_name("a_b"), "_615f")
+
+    def test_merging_runs_matches_one_run(self):
+        pages = [Counter({"ring": 2, "hobbit": 1}), Counter({"ring": 1, "elf": 3}), Counter({"hobbit": 4, "rings": 1})]
+
+        def shards(run_postings):
+            builder = SearchIndexBuilder(self.tmp.name, run_postings)
+            for number, counts in enumerate(pages):
+                builder.add(f"/{number}", str(number), counts)
+            result = list(builder.shards())
+            return result, len(builder.runs)
+
+        merged, runs = shards(2)
+        self.assertEqual(runs, 3)
+        self.assertEqual(merged, shards(100)[0])
+        self.assertEqual(dict(merged)["ri"], {"ring": [0, 2, 1, 1], "rings": [2, 1]})
+
+    def test_build_writes_shards_and_skips_unchanged_sources(self):
+        first = self.write_page("a.md", "# Hobbits\n\nSecond breakfast")
+        second = self.write_page("b.md", "# Elves\n\nNo breakfast")
+        outputs, written = build_search_index([(first, "/a.html"), (second, "/b.html")], self.public, "v1")
+        self.assertIn("search/br.json", outputs)
+        self.assertIn("search/search.js", outputs)
+        self.assertEqual(written, len(outputs))
+        self.assertEqual(self.read_json("index.json")["docs"], [["/a.html", "Hobbits"], ["/b.html", "Elves"]])
+        self.assertEqual(self.read_json("br.json"), {"breakfast": [0, 1, 1, 1]})
+
+        self.assertEqual(build_search_index([(first, "/a.html")], self.public, "v1"), (outputs, 0))
+        outputs, _ = build_search_index([(first, "/a.html")], self.public, "v2")
+        self.assertNotIn("search/el.json", outputs)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search", "el.json")))
+
+    def test_memory_writer(self):
+        page = self.write_page("a.md", "# Hobbits")
+        writer = MemoryWriter()
+        build_search_index([(page, "/a.html")], self.public, "v1", writer=writer)
+        self.assertIsNotNone(writer.get(os.path.join(self.public, "search", "ho.json")))
+        self.assertEqual(build_search_index([(page, "/a.html")], self.public, "v1", writer=writer)[1], 0)
+        self.assertFalse(os.path.exists(self.public))
+
+if __name__ == "__main__":
+    unittest.main()
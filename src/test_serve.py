@@ -0,0 +1,78 @@
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+
+from page_writer import MemoryWriter
+from serve import PreviewSite, ReloadNotifier, inject_live_reload, live_reload_script, make_handler
+
+class TestServe(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = self.tmp.name
+        with open(os.path.join(self.public, "index.css"), 'w') as file:
+            file.write("body {}")
+        with open(os.path.join(self.public, "stale.html"), 'w') as file:
+            file.write("<p>from an old build</p>")
+        self.writer = MemoryWriter()
+        self.writer.files = {"index.css"}
+        self.writer.submit(os.path.join(self.public, "index.html"), "<html><body>home</body></html>")
+        self.writer.submit(os.path.join(self.public, "blog", "index.html"), "<p>blog</p>")
+        self.notifier = ReloadNotifier()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(PreviewSite(self.public, self.writer), self.notifier))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def request(self, path, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response, body
+
+    def test_pages_come_from_memory_with_live_reload(self):
+        response, body = self.request("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertEqual(body, b"<html><body>home" + live_reload_script + b"</body></html>")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_etag_and_not_modified(self):
+        response, _ = self.request("/blog/")
+        etag = response.getheader("ETag")
+        response, body = self.request("/blog/", {"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+        self.writer.submit(os.path.join(self.public, "blog", "index.html"), "<p>changed</p>")
+        response, _ = self.request("/blog/", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+
+    def test_assets_from_disk_redirects_and_missing(self):
+        response, body = self.request("/index.css")
+        self.assertEqual((response.status, body), (200, b"body {}"))
+        self.assertEqual(self.request("/index.css", {"If-None-Match": response.getheader("ETag")})[0].status, 304)
+        response, _ = self.request("/blog")
+        self.assertEqual((response.status, response.getheader("Location")), (301, "/blog/"))
+        self.assertEqual(self.request("/missing.html")[0].status, 404)
+        self.assertEqual(self.request("/stale.html")[0].status, 404)
+        self.assertEqual(self.request("/../index.css")[0].status, 200)
+
+    def test_notifier_wakes_waiters(self):
+        version = self.notifier.version
+        threading.Timer(0.05, self.notifier.notify).start()
+        self.assertEqual(self.notifier.wait(version, 5), version + 1)
+        self.assertEqual(self.notifier.wait(version + 1, 0.01), version + 1)
+
+    def test_inject_without_body_appends(self):
+        self.assertEqual(inject_live_reload(b"<p>x</p>"), b"<p>x</p>" + live_reload_script)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from page_writer import MemoryWriter
+from site_index import SiteIndex, plan_outputs, tag_slug, tag_slugs, write_site_index
+from template import Template
+
+class TestSiteIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(self.content)
+        self.template = Template.parse("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, name, date, tags="[]"):
+        path = os.path.join(self.content, name)
+        with open(path, 'w') as file:
+            file.write(f"---\ndate: {date}\ntags: {tags}\n---\n# {name[:-3].title()}\n")
+        url = "/" if name == "index.md" else "/" + name.replace(".md", ".html")
+        return (path, url, date + tags)
+
+    def read_output(self, name):
+        with open(os.path.join(self.public, name)) as file:
+            return file.read()
+
+    def write(self, index):
+        return write_site_index(index, self.public, self.template, "context", "https://example.com/", per_page=2)
+
+    def test_update_rescans_only_changed_pages(self):
+        pages = [self.write_page("a.md", "2024-01-01"), self.write_page("b.md", "2024-02-01")]
+        index = SiteIndex()
+        self.assertEqual(index.update(pages), 2)
+        self.assertEqual(index.update(pages), 0)
+        changed = self.write_page("b.md", "2024-03-01")
+        self.assertEqual(index.update([pages[0], changed]), 1)
+        self.assertEqual([entry["url"] for entry in index.sorted_entries()], ["/b.html", "/a.html"])
+        self.assertEqual(index.update([changed]), 0)
+        self.assertEqual(list(index.entries), [changed[0]])
+
+    def test_pagination_tags_and_feeds(self):
+        index = SiteIndex()
+        index.update([
+            self.write_page("index.md", "2024-05-01"),
+            self.write_page("a.md", "2024-01-01", "[Books, films]"),
+            self.write_page("b.md", "2024-02-01", "[books]"),
+            self.write_page("c.md", "2024-03-01"),
+        ])
+        outputs, written, unchanged = self.write(index)
+        self.assertEqual(sorted(outputs), [
+            "archive/2/index.html", "archive/index.html", "atom.xml", "sitemap.xml",
+            "tags/books/index.html", "tags/films/index.html", "tags/index.html",
+        ])
+        self.assertEqual((written, unchanged), (7, 0))
+        self.assertEqual(
+            self.read_output("archive/index.html"),
+            '<title>Archive</title><div><h1>Archive</h1><ul>'
+            '<li><a href="/c.html">C</a> <time datetime="2024-03-01">2024-03-01</time></li>'
+            '<li><a href="/b.html">B</a> <time datetime="2024-02-01">2024-02-01</time></li>'
+            '</ul><nav><a href="/archive/2/" rel="next">Older</a></nav></div>',
+        )
+        self.assertIn('<a href="/b.html">B</a>', self.read_output("tags/books/index.html"))
+        self.assertIn('<a href="/tags/books/">books</a> (2)', self.read_output("tags/index.html"))
+
+        sitemap = ElementTree.fromstring(self.read_output("sitemap.xml"))
+        locations = [element.text for element in sitemap.iter("{http://www.sitemaps.org/schemas/sitemap/0.9}loc")]
+        self.assertEqual(locations, [f"https://example.com/{name}" for name in ("", "a.html", "b.html", "c.html")])
+        feed = ElementTree.fromstring(self.read_output("atom.xml"))
+        atom = "{http://www.w3.org/2005/Atom}"
+        self.assertEqual(feed.find(atom + "updated").text, "2024-03-01T00:00:00Z")
+        self.assertEqual([entry.find(atom + "id").text for entry in feed.iter(atom + "entry")],
+                         ["https://example.com/c.html", "https://example.com/b.html", "https://example.com/a.html"])
+
+    def test_only_affected_outputs_are_rewritten(self):
+        pages = [
+            self.write_page("a.md", "2024-01-01", "[x]"),
+            self.write_page("b.md", "2024-02-01", "[y]"),
+            self.write_page("c.md", "2024-03-01", "[y]"),
+        ]
+        index = SiteIndex()
+        index.update(pages)
+        self.write(index)
+        for name in ("archive/index.html", "archive/2/index.html", "tags/y/index.html"):
+            os.utime(os.path.join(self.public, *name.split("/")), (0, 0))
+
+        # a.md drops its tag: the tag list and the feed change, its tag page
+        # goes away, and the archive pages and the other tag page stay as they are.
+        pages[0] = self.write_page("a.md", "2024-01-01")
+        index.update(pages)
+        outputs, written, unchanged = self.write(index)
+        self.assertEqual(os.path.getmtime(os.path.join(self.public, "archive", "index.html")), 0)
+        self.assertEqual(os.path.getmtime(os.path.join(self.public, "archive", "2", "index.html")), 0)
+        self.assertEqual(os.path.getmtime(os.path.join(self.public, "tags", "y", "index.html")), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tags", "x")))
+        self.assertNotIn("tags/x/index.html", outputs)
+        self.assertEqual((written, unchanged), (2, 4))
+
+    def test_memory_writer_and_empty_index(self):
+        index = SiteIndex()
+        index.update([self.write_page("a.md", "2024-01-01", "[x]")])
+        writer = MemoryWriter()
+        write_site_index(index, self.public, self.template, "context", "https://example.com", writer=writer)
+        self.assertIsNotNone(writer.get(os.path.join(self.public, "tags", "x", "index.html")))
+        self.assertFalse(os.path.exists(self.public))
+
+        index.update([])
+        self.assertEqual(plan_outputs(index, self.template, "https://example.com"), {})
+        write_site_index(index, self.public, self.template, "context", "https://example.com", writer=writer)
+        self.assertEqual(writer.pages, {})
+
+    def test_tag_slug(self):
+        self.assertEqual(tag_slug("C++ & Rust"), "c-rust")
+        self.assertEqual(tag_slug("!!"), "tag")
+
+    def test_colliding_tag_slugs_get_their_own_pages(self):
+        slugs = tag_slugs(["c++", "c#"])
+        self.assertEqual(slugs["c#"], "c")
+        self.assertRegex(slugs["c++"], r"^c-[0-9a-f]{6}$")
+
+        index = SiteIndex()
+        index.update([self.write_page("a.md", "2024-01-01", "[C++]"), self.write_page("b.md", "2024-02-01", "[C#, c#]")])
+        outputs = plan_outputs(index, self.template, "https://example.com")
+        self.assertIn("tags/c/index.html", outputs)
+        self.assertIn(f"tags/{slugs['c++']}/index.html", outputs)
+        self.write(index)
+        self.assertIn('<a href="/a.html">A</a>', self.read_output(f"tags/{slugs['c++']}/index.html"))
+        tags = self.read_output("tags/index.html")
+        self.assertIn('<a href="/tags/c/">C#</a> (1)', tags)
+        self.assertIn(f'<a href="/tags/{slugs["c++"]}/">C++</a> (1)', tags)
+
+    def test_feed_author(self):
+        index = SiteIndex()
+        index.update([self.write_page("a.md", "2024-01-01")])
+        atom = "{http://www.w3.org/2005/Atom}"
+        self.write(index)
+        feed = ElementTree.fromstring(self.read_output("atom.xml"))
+        self.assertEqual(feed.find(f"{atom}author/{atom}name").text, "example.com")
+        write_site_index(index, self.public, self.template, "context", "https://example.com/", author="Bilbo")
+        feed = ElementTree.fromstring(self.read_output("atom.xml"))
+        self.assertEqual(feed.find(f"{atom}author/{atom}name").text, "Bilbo")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import io
+import os
+import tempfile
+import unittest
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import Template, load_template
+
+class TestTemplate(unittest.TestCase):
+
+    def test_parse_segments_and_slots(self):
+        template = Template.parse("<title> {{ Title }} </title>{{Content}}!")
+        self.assertEqual(template.segments, ["<title> ", " </title>", "!"])
+        self.assertEqual(template.placeholders(), ["Title", "Content"])
+
+    def test_render_values_and_nodes(self):
+        template = Template.parse("<h1>{{ Title }}</h1>{{ Content }}<p>{{ Path }}</p>")
+        content = ParentNode("div", [LeafNode("b", "hi")])
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": content, "Path": "/"}),
+            "<h1>Home</h1><div><b>hi</b></div><p>/</p>",
+        )
+
+    def test_missing_values_are_left_in_place(self):
+        template = Template.parse("{{ Title }} {{ unknown }}")
+        self.assertEqual(template.render({"Title": "Home"}), "Home {{ unknown }}")
+
+    def test_render_to_streams_into_file(self):
+        template = Template.parse("a{{ x }}b")
+        buffer = io.StringIO()
+        template.render_to(buffer, {"x": 1})
+        self.assertEqual(buffer.getvalue(), "a1b")
+
+    def test_no_placeholders(self):
+        self.assertEqual(Template.parse("static").render({}), "static")
+
+    def test_load_template_is_cached_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, 'w') as file:
+                file.write("{{ Title }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, 'w') as file:
+                file.write("<b>{{ Title }}</b>")
+            self.assertEqual(load_template(path).render({"Title": "x"}), "<b>x</b>")
+
+    def test_includes_are_expanded_and_tracked(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "partials"))
+            with open(os.path.join(tmp, "partials", "nav.html"), 'w') as file:
+                file.write("<nav>{{> links.html }}</nav>")
+            with open(os.path.join(tmp, "partials", "links.html"), 'w') as file:
+                file.write("<a href=\"{{ Path }}\">here</a>")
+            template = Template.parse("{{> partials/nav.html }}{{ Title }}", tmp)
+            self.assertEqual(template.render({"Title": "T", "Path": "/"}), '<nav><a href="/">here</a></nav>T')
+            self.assertEqual(
+                template.dependencies,
+                [os.path.join(tmp, "partials", "nav.html"), os.path.join(tmp, "partials", "links.html")],
+            )
+
+    def test_include_cycle_raises(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "a.html"), 'w') as file:
+                file.write("{{> a.html }}")
+            with self.assertRaises(ValueError):
+                Template.parse("{{> a.html }}", tmp)
+
+    def test_includes_need_a_base_dir(self):
+        self.assertEqual(Template.parse("{{> nav.html }}").render({}), "{{> nav.html }}")
+
+if __name__ == "__main__":
+    unittest.main()
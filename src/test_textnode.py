@@ -22,6 +22,10 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", text_type_text, "https://www.boot.dev")
         self.assertEqual(node, node2)
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", text_type_text)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     def test_repr(self):
         node = TextNode("This is a text node", text_type_text, "https://www.boot.dev")
         self.assertEqual(
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from watch import diff_snapshots, is_under, take_snapshot, wait_for_changes
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_snapshot_and_diff(self):
+        kept = self.write("kept.md", "a")
+        gone = self.write("gone.md", "b")
+        before = take_snapshot([self.dir])
+        os.remove(gone)
+        self.write("kept.md", "changed")
+        added = self.write("new.md", "c")
+        changed, removed = diff_snapshots(before, take_snapshot([self.dir]))
+        self.assertEqual(changed, {kept, added})
+        self.assertEqual(removed, {gone})
+
+    def test_snapshot_of_single_file(self):
+        path = self.write("template.html", "x")
+        self.assertEqual(list(take_snapshot([path])), [path])
+
+    def test_wait_for_changes_returns_after_settling(self):
+        path = self.write("page.md", "a")
+        snapshot = take_snapshot([self.dir])
+        os.utime(path, ns=(0, 0))
+        current, changed, removed = wait_for_changes([self.dir], snapshot, interval=0.01, debounce=0.02)
+        self.assertEqual(changed, {path})
+        self.assertEqual(removed, set())
+        self.assertEqual(current, take_snapshot([self.dir]))
+
+    def test_file_replaced_by_rename_is_changed_not_removed(self):
+        path = self.write("template.html", "a")
+        snapshot = take_snapshot([self.dir])
+        os.remove(path)
+        threading.Timer(0.1, self.write, ("template.html", "saved")).start()
+        current, changed, removed = wait_for_changes([self.dir], snapshot, interval=0.01, debounce=0.02)
+        self.assertEqual((changed, removed), ({path}, set()))
+
+        os.remove(path)
+        current, changed, removed = wait_for_changes([self.dir], current, interval=0.01, debounce=0.02, removal_grace=0.05)
+        self.assertEqual((changed, removed), (set(), {path}))
+
+    def test_is_under(self):
+        self.assertTrue(is_under(os.path.join("content", "a.md"), "content"))
+        self.assertFalse(is_under(os.path.join("contents", "a.md"), "content"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+from asset_urls import image_props, rewrite_url
 from leafnode import LeafNode
 
 text_type_text = "text"
@@ -8,6 +9,8 @@ text_type_link = "link"
 text_type_image = "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -33,8 +36,12 @@ def text_node_to_html_node(text_node):
     if text_node.text_type == text_type_code:
         return LeafNode("code", text_node.text)
     if text_node.text_type == text_type_link:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return LeafNode("a", text_node.text, {"href": rewrite_url(text_node.url)})
     if text_node.text_type == text_type_image:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        props = {"src": rewrite_url(text_node.url), "alt": text_node.text}
+        extra = image_props(text_node.url)
+        if extra is not None:
+            props.update(extra)
+        return LeafNode("img", "", props)
     raise ValueError(f"Invalid text type: {text_node.text_type}")
     
\ No newline at end of file
@@ -0,0 +1,56 @@
+import os
+import time
+
+
+def take_snapshot(paths):
+    snapshot = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dir_path, _, file_names in os.walk(path):
+            for name in file_names:
+                file_path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+def diff_snapshots(old, new):
+    changed = {path for path, key in new.items() if old.get(path) != key}
+    removed = set(old) - set(new)
+    return changed, removed
+
+def wait_for_changes(paths, snapshot, interval=0.1, debounce=0.2, removal_grace=1.0):
+    while True:
+        time.sleep(interval)
+        current = take_snapshot(paths)
+        if current != snapshot:
+            break
+
+    # Editors often write a file in several steps; wait for the tree to settle
+    # so one save triggers one rebuild.
+    settled_at = time.monotonic()
+    while time.monotonic() - settled_at < debounce:
+        time.sleep(interval)
+        latest = take_snapshot(paths)
+        if latest != current:
+            current = latest
+            settled_at = time.monotonic()
+
+    # Editors that save by renaming a temporary file over the original make it
+    # vanish for a moment; only report a removal once the file stays gone.
+    changed, removed = diff_snapshots(snapshot, current)
+    deadline = time.monotonic() + removal_grace
+    while removed and time.monotonic() < deadline:
+        time.sleep(interval)
+        if any(os.path.exists(path) for path in removed):
+            current = take_snapshot(paths)
+            changed, removed = diff_snapshots(snapshot, current)
+    return current, changed, removed
+
+def is_under(path, directory):
+    return os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) == os.path.abspath(directory)